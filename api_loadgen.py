@@ -0,0 +1,114 @@
+"""Local load generator for api_server.py.
+
+Each worker thread keeps one keep-alive connection open and sends requests
+back to back for a fixed time, then the run reports requests/s and p50/p99
+latency.
+
+    python api_loadgen.py --concurrency 8 --seconds 10
+    python api_loadgen.py --binary --batch 256
+"""
+import argparse
+import http.client
+import json
+import random
+import socket
+import threading
+import time
+
+import numpy as np
+
+from api_server import BINARY_TYPE, DEFAULT_PORT
+
+
+def random_rows(n):
+    return [[round(random.uniform(5, 9), 1), float(random.randrange(0, 50000, 100)), round(random.uniform(0, 10), 1)]
+            for _ in range(n)]
+
+
+def make_request(batch, binary):
+    rows = random_rows(batch)
+    path = '/predict' if batch == 1 else '/predict_batch'
+    if binary:
+        return path, np.asarray(rows, dtype='<f8').tobytes(), {'Content-Type': BINARY_TYPE}
+    if batch == 1:
+        ph, solids, turbidity = rows[0]
+        body = {'ph': ph, 'solids': solids, 'turbidity': turbidity}
+    else:
+        body = {'rows': rows}
+    return path, json.dumps(body).encode(), {'Content-Type': 'application/json'}
+
+
+def connect(host, port):
+    conn = http.client.HTTPConnection(host, port)
+    conn.connect()
+    # http.client writes headers and body separately; don't let Nagle hold the body
+    conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return conn
+
+
+def worker(host, port, deadline, batch, binary, latencies, errors):
+    conn = connect(host, port)
+    # Pre-build a small pool of bodies so the client does not dominate the timing
+    requests = [make_request(batch, binary) for _ in range(64)]
+    i = 0
+    while time.perf_counter() < deadline:
+        path, body, headers = requests[i % len(requests)]
+        i += 1
+        t0 = time.perf_counter()
+        try:
+            conn.request('POST', path, body, headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+                continue
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(str(e))
+            conn.close()
+            conn = connect(host, port)
+            continue
+        latencies.append(time.perf_counter() - t0)
+    conn.close()
+
+
+def run(host, port, concurrency, seconds, batch=1, binary=False):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=worker, args=(host, port, deadline, batch, binary, latencies, errors))
+               for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    lat = np.array(latencies) * 1e3
+    return {
+        'requests': len(lat),
+        'errors': len(errors),
+        'requests_per_s': len(lat) / elapsed,
+        'rows_per_s': len(lat) * batch / elapsed,
+        'p50_ms': float(np.percentile(lat, 50)) if len(lat) else float('nan'),
+        'p99_ms': float(np.percentile(lat, 99)) if len(lat) else float('nan'),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the prediction API.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--concurrency', type=int, default=8, help="Parallel keep-alive connections")
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--batch', type=int, default=1, help="Rows per request; >1 uses /predict_batch")
+    parser.add_argument('--binary', action='store_true', help="Send the compact binary body format")
+    args = parser.parse_args(argv)
+
+    stats = run(args.host, args.port, args.concurrency, args.seconds, args.batch, args.binary)
+    print(f"{stats['requests']:,} requests ({stats['errors']} errors) in {args.seconds:.0f}s "
+          f"over {args.concurrency} connection(s), {'binary' if args.binary else 'JSON'}, batch {args.batch}")
+    print(f"  {stats['requests_per_s']:,.0f} req/s  {stats['rows_per_s']:,.0f} rows/s  "
+          f"p50 {stats['p50_ms']:.2f} ms  p99 {stats['p99_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Headless HTTP prediction API for the water-potability model.
+
+Serves the same WaterPredictor the dashboards load, without a Streamlit
+rerun per request.  HTTP/1.1 keep-alive is on, so clients can reuse one
+connection for many predictions.
+
+    POST /predict         {"ph": 7.0, "solids": 20000, "turbidity": 4.0}
+    POST /predict_batch   {"rows": [[7.0, 20000, 4.0], ...]}
+    GET  /health
+
+Both POST endpoints also take Content-Type: application/octet-stream with
+n x 3 little-endian float64 (ph, solids, turbidity) and answer with n packed
+BINARY_RESULT records (uint8 label, float32 confidence, float32 p_potable).
+
+    python api_server.py --port 8600
+    python api_loadgen.py --port 8600 --concurrency 8 --seconds 10
+"""
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from coalescer import PredictionCoalescer
+from model_registry import HotPredictor
+from prediction_cache import PredictionCache
+from predictor import DEFAULT_MODEL, WaterPredictor
+from sensor_ingest import reading_features
+
+DEFAULT_PORT = 8600
+BINARY_TYPE = 'application/octet-stream'
+BINARY_RESULT = np.dtype([('label', '<u1'), ('confidence', '<f4'), ('p_potable', '<f4')])
+
+
+def encode_binary(labels, confidence, p_potable):
+    out = np.empty(len(labels), dtype=BINARY_RESULT)
+    out['label'] = labels
+    out['confidence'] = confidence
+    out['p_potable'] = p_potable
+    return out.tobytes()
+
+
+def decode_binary_rows(body):
+    if len(body) % 24:
+        raise ValueError("Binary body must be a whole number of 3 x float64 rows")
+    return np.frombuffer(body, dtype='<f8').reshape(-1, 3)
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+    # Headers and body go out as separate writes; without TCP_NODELAY every
+    # response waits on the client's delayed ACK (~40 ms)
+    disable_nagle_algorithm = True
+    predictor = None
+
+    def log_message(self, format, *args):
+        pass  # one log line per request would cost more than the prediction
+
+    def _send(self, status, body, content_type='application/json'):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send(200, {'status': 'ok', 'model_version': self.predictor.version})
+        else:
+            self._send(404, {'error': f'No route for GET {self.path}'})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        binary = self.headers.get('Content-Type', '').startswith(BINARY_TYPE)
+        try:
+            if self.path == '/predict':
+                self._predict(body, binary)
+            elif self.path == '/predict_batch':
+                self._predict_batch(body, binary)
+            else:
+                self._send(404, {'error': f'No route for POST {self.path}'})
+        except (ValueError, KeyError, TypeError) as e:
+            self._send(400, {'error': f'Bad request body: {e}'})
+
+    def _predict(self, body, binary):
+        p = self.predictor.active()
+        if binary:
+            rows = decode_binary_rows(body)
+            if len(rows) != 1:
+                raise ValueError("/predict takes exactly one row")
+            result = p.predict_one(*rows[0].tolist())
+        else:
+            result = p.predict_one(*reading_features(json.loads(body)))
+        p_potable = float(result.proba[p.potable_index])
+        if binary:
+            self._send(200, encode_binary([result.label], [result.confidence], [p_potable]), BINARY_TYPE)
+        else:
+            self._send(200, {'label': result.label, 'confidence': result.confidence,
+                             'p_potable': p_potable, 'model_version': result.version})
+
+    def _predict_batch(self, body, binary):
+        p = self.predictor.active()
+        rows = decode_binary_rows(body) if binary else np.asarray(json.loads(body)['rows'], dtype=np.float64)
+        if rows.ndim != 2 or rows.shape[1] != 3:
+            raise ValueError("rows must be an n x 3 array of [ph, solids, turbidity]")
+        labels, confidence, proba = p.predict_batch(rows)
+        p_potable = proba[:, p.potable_index]
+        if binary:
+            self._send(200, encode_binary(labels, confidence, p_potable), BINARY_TYPE)
+        else:
+            self._send(200, {'labels': labels.tolist(), 'confidence': confidence.tolist(),
+                             'p_potable': p_potable.tolist(), 'model_version': p.version})
+
+
+def make_server(host, port, predictor):
+    handler = type('BoundPredictionHandler', (PredictionHandler,), {'predictor': predictor})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve water-potability predictions over HTTP.")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    args = parser.parse_args(argv)
+
+    def configure(predictor):
+        predictor.cache = PredictionCache(maxsize=4096)
+        # Handler threads that miss the cache share one vectorized model call
+        predictor.coalescer = PredictionCoalescer(predictor.predict_rows)
+
+    # Same loading path as load_model() in app7.py: follow the registry, else args.model
+    predictor = HotPredictor(fallback=lambda: WaterPredictor.from_path(args.model), configure=configure)
+    server = make_server(args.host, args.port, predictor)
+    print(f"Serving predictions on http://{args.host}:{args.port} (model {predictor.version})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
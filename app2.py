@@ -1,9 +1,9 @@
 import streamlit as st
 import pandas as pd
-import pickle
 import numpy as np
 import warnings
-import sklearn  # Ensure sklearn is imported before unpickling
+
+from predictor import WaterPredictor
 
 # Suppress sklearn version warnings when unpickling
 warnings.filterwarnings('ignore', category=UserWarning)
@@ -16,8 +16,7 @@ st.set_page_config(page_title="Aqua Sight AI", page_icon="💧", layout="centere
 @st.cache_resource
 def load_model():
     try:
-        with open('water_model.pkl', 'rb') as f:
-            return pickle.load(f)
+        return WaterPredictor.from_path('water_model.pkl')
     except FileNotFoundError:
         st.error("⚠️ Error: 'water_model.pkl' not found! Please place the model file in the same folder as this script.")
         return None
@@ -29,7 +28,7 @@ def load_model():
         st.error(f"⚠️ Error loading model: {str(e)}")
         return None
 
-model = load_model()
+predictor = load_model()
 
 # --- 2. USER INTERFACE (UI) ---
 st.title("💧 Aqua Sight AI")
@@ -37,7 +36,7 @@ st.markdown("### *Intelligent Water Quality Monitoring*")
 st.write("Presented by **The Quad-core Creators**")
 st.divider()
 
-if model is None:
+if predictor is None:
     st.error("⚠️ Error: 'water_model.pkl' not found! Please place the model file in the same folder as this script.")
 else:
     # --- 3. INPUT SLIDERS (Simulating IoT Sensors) ---
@@ -52,12 +51,11 @@ else:
     # --- 4. PREDICTION LOGIC ---
     # Create a button for the judges to click
     if st.button("Analyze Water Safety"):
-        # Formatting data for the model
-        input_data = np.array([[ph, solids, turbidity]])
-        prediction = model.predict(input_data)
+        # Single probability pass through the shared predictor
+        result = predictor.predict_one(ph, solids, turbidity)
         
         st.subheader("Final Verdict:")
-        if prediction[0] == 1:
+        if result.label == 1:
             st.success("✅ **POTABLE**: The water is safe for consumption.")
             st.balloons()
         else:
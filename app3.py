@@ -3,9 +3,15 @@ import pandas as pd
 import numpy as np
 import time
 import json
-import requests
 from sklearn.ensemble import RandomForestClassifier
-from streamlit_lottie import st_lottie
+from lottie_cache import load_lottie
+
+# streamlit_lottie is optional, as in app4.py: without it the splash skips the animation
+try:
+    from streamlit_lottie import st_lottie
+except ImportError:
+    def st_lottie(*args, **kwargs):
+        return None
 
 # ============================================================
 # PROJECT: AquaAI
@@ -104,29 +110,27 @@ def apply_custom_styles():
     """, unsafe_allow_html=True)
 
 # 3. Animation Loading (Lottie)
-def load_lottieurl(url: str):
-    r = requests.get(url)
-    if r.status_code!= 200:
-        return None
-    return r.json()
+# Served from the disk cache (or the bundled offline copy) and refreshed in a
+# background thread, so a rerun never waits on lottiefiles.com
+LOTTIE_WATER_URL = "https://assets5.lottiefiles.com/packages/lf20_V9t630.json"
 
 # 4. Machine Learning Model Setup (Cached)
 @st.cache_resource
 def initialize_aqua_model():
     # In a production scenario, this loads a pre-trained joblib/pickle file
     # Here, we simulate a model trained on water potability parameters 
-    X_sample = np.rando[span_44](start_span)[span_44](end_span)[span_47](start_span)[span_47](end_span)m.rand(100, 3) *  # pH, Turbidity, Temp
+    X_sample = np.random.rand(100, 3) * np.array([14.0, 10.0, 35.0])  # pH, Turbidity, Temp
     y_sample = (X_sample[:, 0] > 6.5) & (X_sample[:, 0] < 8.5) & (X_sample[:, 1] < 5.0)
     y_sample = y_sample.astype(int)
     
-    rf = RandomForestClassif[span_0](start_span)[span_0](end_span)[span_1](start_span)[span_1](end_span)[span_2](start_span)[span_2](end_span)ier(n_estimators=100, random_state=42)
+    rf = RandomForestClassifier(n_estimators=100, random_state=42)
     rf.fit(X_sample, y_sample)
     return rf
 
 # Initialize App
 apply_custom_styles()
 model = initialize_aqua_model()
-lottie_water = load_lottieurl("https://assets5.lottiefiles.com/packages/lf20_V9t630.json")
+lottie_water = load_lottie(LOTTIE_WATER_URL, bundled='water_drop.json')
 
 # 5. State-Based Page Management
 if 'current_page' not in st.session_state:
@@ -173,10 +177,10 @@ elif st.session_state.current_page == 'dashboard':
         with st.spinner("Analyzing spectral and chemical signatures..."):
             # Prepare data for model
             features = np.array([[ph_input, turb_input, temp_input]])
+            t0 = time.perf_counter()
             prediction = model.predict(features)
-            confidence = model.predict_proba(features)
-            
-            time.sleep(1.5) # Simulated latency for 'professional' feel
+            confidence = model.predict_proba(features)[0]  # the one row's class probabilities
+            inference_ms = (time.perf_counter() - t0) * 1e3
             
             st.divider()
             
@@ -189,6 +193,7 @@ elif st.session_state.current_page == 'dashboard':
             else:
                 res_col.error("### STATUS: NON-POTABLE")
                 conf_col.metric("Model Confidence", f"{max(confidence)*100:.1f}%", delta="- Danger", delta_color="inverse")
+            st.caption(f"Inference {inference_ms:.1f} ms")
     
     # Reset Option
     if st.sidebar.button("Back to Splash"):
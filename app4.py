@@ -1,27 +1,24 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
+import os
 import time
-import json
-import requests
-import pickle
-import importlib.util
-import warnings
-try:
-    from sklearn.exceptions import InconsistentVersionWarning
-    warnings.filterwarnings("ignore", category=InconsistentVersionWarning)
-except Exception:
-    pass
-from sklearn.ensemble import RandomForestClassifier
-
-# Dynamically import `st_lottie` if available, otherwise use a no-op fallback.
-_spec = importlib.util.find_spec("streamlit_lottie")
-if _spec is not None:
-    _mod = importlib.import_module("streamlit_lottie")
-    st_lottie = getattr(_mod, "st_lottie", lambda *a, **k: None)
-else:
-    def st_lottie(*args, **kwargs):
+
+from lottie_cache import load_lottie
+
+# numpy, sklearn and the model are imported by the dashboard code paths that
+# use them, so the splash paints without loading any of them (see startup_budget.py)
+
+@st.cache_resource
+def _lottie_renderer():
+    # `st_lottie` if streamlit_lottie is installed, otherwise None; probed once per process
+    try:
+        from streamlit_lottie import st_lottie
+    except ImportError:
         return None
+    return st_lottie
+
+def st_lottie(*args, **kwargs):
+    render = _lottie_renderer()
+    return render(*args, **kwargs) if render else None
 
 # --- App configuration ---
 st.set_page_config(
@@ -50,49 +47,62 @@ def apply_custom_styles():
     </style>
     """, unsafe_allow_html=True)
 
-def load_lottieurl(url: str):
-    try:
-        r = requests.get(url, timeout=5)
-        if r.status_code != 200:
-            return None
-        return r.json()
-    except Exception:
-        return None
+# Served from the disk cache (or the bundled offline copy) and refreshed in a
+# background thread, so a rerun never waits on lottiefiles.com
+LOTTIE_WATER_URL = "https://assets5.lottiefiles.com/packages/lf20_V9t630.json"
 
 @st.cache_resource
 def load_model_from_file(path='water_model.pkl'):
+    from predictor import load_model, resolve_model_path
     try:
-        with open(path, 'rb') as f:
-            return pickle.load(f)
+        # Uses the memory-mapped .aqsf artifact when one sits next to the pickle
+        return load_model(resolve_model_path(path))
     except FileNotFoundError:
         return None
     except Exception:
         return None
 
 @st.cache_resource
-def make_fallback_model():
-    X_sample = np.random.rand(100, 3) * np.array([14.0, 10.0, 35.0])
-    y_sample = ((X_sample[:, 0] > 6.5) & (X_sample[:, 0] < 8.5) & (X_sample[:, 1] < 5.0)).astype(int)
-    rf = RandomForestClassifier(n_estimators=100, random_state=42)
-    rf.fit(X_sample, y_sample)
-    return rf
+def fallback_model_future():
+    # Seeded fallback forest (see fallback_model.py), loaded from its disk cache
+    # or trained once per host on a background thread while the splash paints
+    from concurrent.futures import ThreadPoolExecutor
+
+    def load():
+        from predictor import make_fallback_model
+        return make_fallback_model()
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix='fallback-model').submit(load)
+
+def model_file_missing(path='water_model.pkl'):
+    return not (os.path.exists(path) or os.path.exists(os.path.splitext(path)[0] + '.aqsf'))
 
 @st.cache_resource
 def get_model():
     m = load_model_from_file('water_model.pkl')
     if m is None:
-        return make_fallback_model()
+        return fallback_model_future().result()
     return m
 
+@st.cache_resource
+def get_predictor():
+    from model_registry import HotPredictor
+    from model_server import remote_predictor
+    from predictor import WaterPredictor
+    # The host's model server (model_server.py) when one is running, so
+    # replicas neither load the model nor train their own fallback;
+    # otherwise the registry's current version, hot-swapped when it changes
+    return remote_predictor() or HotPredictor(fallback=lambda: WaterPredictor(get_model()))
+
 # Initialize
 apply_custom_styles()
-model = get_model()
-lottie_water = load_lottieurl("https://assets5.lottiefiles.com/packages/lf20_V9t630.json")
+lottie_water = load_lottie(LOTTIE_WATER_URL, bundled='water_drop.json')
 
 if 'current_page' not in st.session_state:
     st.session_state.current_page = 'splash'
 
 if st.session_state.current_page == 'splash':
+    if model_file_missing():
+        fallback_model_future()  # ready by the time GET STARTED is clicked
     st.markdown("<br><br><br>", unsafe_allow_html=True)
     if lottie_water:
         st_lottie(lottie_water, height=250, key="splash_lottie")
@@ -117,19 +127,19 @@ elif st.session_state.current_page == 'dashboard':
 
     st.markdown("<br>", unsafe_allow_html=True)
     if st.button("RUN AI PREDICTION"):
+        import numpy as np
+        predictor = get_predictor()
         with st.spinner("Analyzing spectral and chemical signatures..."):
             features = np.array([[ph_input, turb_input, temp_input]])
+            t0 = time.perf_counter()
             try:
-                prediction = model.predict(features)
+                prediction, confidence, _ = predictor.predict_batch(features)
+                conf = float(confidence[0])
             except Exception:
                 st.error("Model failed to predict")
                 prediction = [0]
-            try:
-                probs = model.predict_proba(features)
-                conf = float(probs.max())
-            except Exception:
                 conf = 0.0
-            time.sleep(1.0)
+            inference_ms = (time.perf_counter() - t0) * 1e3
             st.divider()
             res_col, conf_col = st.columns(2)
             if prediction[0] == 1:
@@ -139,6 +149,7 @@ elif st.session_state.current_page == 'dashboard':
             else:
                 res_col.error("### STATUS: NON-POTABLE")
                 conf_col.metric("Model Confidence", f"{conf*100:.1f}%", delta="- Danger", delta_color="inverse")
+            st.caption(f"Inference {inference_ms:.1f} ms")
 
     if st.sidebar.button("Back to Splash"):
         st.session_state.current_page = 'splash'
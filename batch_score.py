@@ -0,0 +1,155 @@
+"""Headless batch scoring for logged sensor readings.
+
+Streams a CSV or Parquet file through water_model.pkl in fixed-size chunks and
+writes every row back out with prediction / confidence / p_potable columns.
+Only one chunk per worker is held in memory at a time.
+
+    python batch_score.py readings.csv scored.csv --chunksize 200000 --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from predictor import DEFAULT_MODEL, FEATURES, WaterPredictor
+
+
+# --- 1. MODEL ---
+def score_array(predictor, X):
+    labels, confidence, proba = predictor.predict_batch(X)
+    return labels, confidence, proba[:, predictor.potable_index]
+
+
+# Worker processes load the model once and then only receive feature arrays
+_worker_predictor = None
+
+
+def _init_worker(model_path):
+    global _worker_predictor
+    _worker_predictor = WaterPredictor.from_path(model_path)
+
+
+def _score_in_worker(X):
+    return score_array(_worker_predictor, X)
+
+
+# --- 2. CHUNKED I/O ---
+def is_parquet(path):
+    return path.lower().endswith(('.parquet', '.pq'))
+
+
+def read_chunks(path, chunksize):
+    if is_parquet(path):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+
+class ChunkWriter:
+    def __init__(self, path):
+        self.path = path
+        self._parquet_writer = None
+        self._started = False
+
+    def write(self, df):
+        if is_parquet(self.path):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode='a' if self._started else 'w', header=not self._started, index=False)
+        self._started = True
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+def features_of(chunk, features):
+    missing = [c for c in features if c not in chunk.columns]
+    if missing:
+        raise KeyError(f"Input is missing feature column(s): {', '.join(missing)}")
+    return chunk[features].to_numpy(dtype=np.float64)
+
+
+def attach_results(chunk, result):
+    labels, confidence, p_potable = result
+    chunk['prediction'] = labels
+    chunk['confidence'] = confidence
+    chunk['p_potable'] = p_potable
+    return chunk
+
+
+# --- 3. DRIVER ---
+def score_file(src, dst, model_path=DEFAULT_MODEL, chunksize=100_000, workers=1,
+               features=FEATURES, report=sys.stderr):
+    writer = ChunkWriter(dst)
+    rows = 0
+    start = time.perf_counter()
+
+    def progress():
+        elapsed = time.perf_counter() - start
+        print(f"  {rows:>12,} rows  {elapsed:8.2f}s  {rows / max(elapsed, 1e-9):>12,.0f} rows/s",
+              file=report)
+
+    try:
+        if workers <= 1:
+            predictor = WaterPredictor.from_path(model_path)
+            for chunk in read_chunks(src, chunksize):
+                writer.write(attach_results(chunk, score_array(predictor, features_of(chunk, features))))
+                rows += len(chunk)
+                progress()
+        else:
+            # Keep at most 2 chunks per worker in flight so memory stays bounded,
+            # and write results back in input order.
+            pending = []
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(model_path,)) as pool:
+                for chunk in read_chunks(src, chunksize):
+                    pending.append((chunk, pool.submit(_score_in_worker, features_of(chunk, features))))
+                    if len(pending) >= 2 * workers:
+                        done_chunk, future = pending.pop(0)
+                        writer.write(attach_results(done_chunk, future.result()))
+                        rows += len(done_chunk)
+                        progress()
+                for done_chunk, future in pending:
+                    writer.write(attach_results(done_chunk, future.result()))
+                    rows += len(done_chunk)
+                    progress()
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    return rows, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score logged water readings in chunks.")
+    parser.add_argument("input", help="CSV or Parquet file with ph / Solids / Turbidity columns")
+    parser.add_argument("output", help="CSV or Parquet destination (format follows the extension)")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Path to water_model.pkl")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="Rows per chunk (default: 100000)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help=f"Worker processes to spread chunks over (this host has {os.cpu_count()} CPUs)")
+    parser.add_argument("--features", default=",".join(FEATURES),
+                        help="Comma-separated input columns in model order")
+    args = parser.parse_args(argv)
+
+    features = [c.strip() for c in args.features.split(",")]
+    print(f"Scoring {args.input} -> {args.output} ({args.workers} worker(s), chunks of {args.chunksize:,})",
+          file=sys.stderr)
+    rows, elapsed = score_file(args.input, args.output, args.model, args.chunksize, args.workers, features)
+    print(f"Done: {rows:,} rows in {elapsed:.2f}s = {rows / max(elapsed, 1e-9):,.0f} rows/s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
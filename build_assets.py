@@ -0,0 +1,120 @@
+"""Minified CSS and SVG for the dashboards, plus the static/ location for images.
+
+Sources live in assets/.  stylesheet() minifies CSS sources once per server
+process and inlines the SVGs they reference as data: URIs.  Each page sends
+the theme plus only the styles of what it draws (splash, waves, loader), as
+one compact <style> block instead of the hand-written markup.
+
+The CSS stays inline on purpose: Streamlit's app/static route (Tornado
+server, 1.37 to about 1.55) sends .css and .svg as text/plain with
+"X-Content-Type-Options: nosniff", which browsers refuse, and no Streamlit
+release lets the app set Cache-Control there.  static/ (served at
+app/static/ with server.enableStaticServing) only holds the raster image
+variants from image_assets.py, whose types every release serves correctly.
+
+    python build_assets.py                    # CSS sizes, source vs inline
+    python build_assets.py --report app7.py   # per-rerun payload bytes per page
+"""
+import argparse
+import functools
+import os
+import re
+from urllib.parse import quote
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSET_DIR = os.path.join(BASE_DIR, 'assets')
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+STATIC_URL = 'app/static/'
+
+CSS_URL = re.compile(r'url\(\s*["\']?([\w.-]+\.svg)["\']?\s*\)')
+# Characters an SVG data: URI can carry unescaped inside url("...")
+URI_SAFE = " =:/;,'"
+
+
+def minify_css(text):
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+    text = re.sub(r'\s*:\s*', ':', text)
+    return text.replace(';}', '}').strip()
+
+
+def minify_svg(text):
+    text = re.sub(r'<!--.*?-->', '', text, flags=re.S)
+    text = re.sub(r'>\s+<', '><', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def _read(name):
+    with open(os.path.join(ASSET_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def svg_data_uri(name):
+    # Percent-encoding only what a URL needs keeps it smaller than base64
+    svg = minify_svg(_read(name)).replace('"', "'")
+    return f'url("data:image/svg+xml,{quote(svg, safe=URI_SAFE)}")'
+
+
+@functools.lru_cache(maxsize=None)
+def bundle_css(*sources):
+    """The CSS sources, concatenated and minified, with the SVGs they use inlined."""
+    css = minify_css("\n".join(_read(name) for name in sources))
+    return CSS_URL.sub(lambda m: svg_data_uri(m.group(1)), css)
+
+
+def stylesheet(*sources):
+    """HTML for st.markdown(..., unsafe_allow_html=True) applying CSS sources (default: the theme).
+
+    Pages send only the parts they draw: the theme on every rerun, the
+    splash, wave and loader styles next to their markup.
+    """
+    return f'<style>{bundle_css(*(sources or ("theme.css",)))}</style>'
+
+
+# --- PAYLOAD REPORT ---
+def rerun_payload(app_path, page, state_key='page'):
+    """Bytes of the element messages one steady-state rerun of a page sends."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(app_path, default_timeout=60)
+    at.session_state[state_key] = page
+    at.run()
+    at.run()  # second run: one-off first-visit output (the splash) is gone
+
+    def walk(node):
+        total = node.proto.ByteSize() if getattr(node, 'proto', None) is not None else 0
+        for child in getattr(node, 'children', {}).values():
+            total += walk(child)
+        return total
+    return walk(at._tree)
+
+
+def report(apps, pages):
+    import logging
+    import warnings
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+    warnings.filterwarnings('ignore')
+
+    print(f"{'app':<16}" + "".join(f"{page:>12}" for page in pages))
+    for app in apps:
+        sizes = [rerun_payload(os.path.abspath(app), page) for page in pages]
+        print(f"{os.path.basename(app):<16}" + "".join(f"{size:>10,} B" for size in sizes))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report the dashboards' inline asset sizes.")
+    parser.add_argument('--report', nargs='+', metavar='APP', help="Print per-rerun payload bytes for these apps")
+    parser.add_argument('--pages', default='landing,welcome,about,dashboard')
+    args = parser.parse_args(argv)
+
+    if args.report:
+        report(args.report, args.pages.split(','))
+        return
+    for name in sorted(os.listdir(ASSET_DIR)):
+        if name.endswith('.css'):
+            size = len(_read(name).encode('utf-8'))
+            print(f"{name:<20} {size:>7,} B source -> {len(stylesheet(name).encode('utf-8')):>7,} B inline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Request coalescing in front of the shared model.
+
+Concurrent single-row predictions (Streamlit session threads, API handler
+threads, asyncio tasks) are collected for a short window or until max_batch
+rows are waiting, scored with one vectorized call and fanned back out to the
+waiting callers.
+
+    python coalescer.py --bench       # direct vs coalesced throughput by concurrency
+"""
+import argparse
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class PredictionCoalescer:
+    def __init__(self, predict_rows, max_wait=0.002, max_batch=256):
+        # predict_rows(X) -> one result per row of the (n, 3) array X
+        self.predict_rows = predict_rows
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self.batches = 0
+        self.items = 0
+        self._last_batch = 1
+        self._queue = []
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='prediction-coalescer', daemon=True)
+        self._thread.start()
+
+    def submit(self, row):
+        future = Future()
+        with self._cond:
+            if not self._closed:
+                self._queue.append((row, future))
+                self._cond.notify()
+                return future
+        # Closed (e.g. its model version was swapped out): answer on the caller's thread
+        try:
+            future.set_result(self.predict_rows(np.array([row], dtype=np.float64))[0])
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def predict(self, row, timeout=None):
+        return self.submit(row).result(timeout)
+
+    async def predict_async(self, row):
+        return await asyncio.wrap_future(self.submit(row))
+
+    def _take_batch(self):
+        with self._cond:
+            while not self._queue:
+                if self._closed:
+                    return None
+                self._cond.wait()
+            # The window opens with the first waiting request and closes early
+            # once as many callers are waiting as the last batch served: with
+            # callers that wait for their answer, nobody else is coming
+            deadline = time.monotonic() + self.max_wait
+            target = min(self._last_batch, self.max_batch)
+            while len(self._queue) < target:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, self._queue = self._queue[:self.max_batch], self._queue[self.max_batch:]
+            self._last_batch = max(len(batch), 1)
+        # Callers that gave up while queued (a cancelled await) are dropped; the
+        # rest are marked running, so a later cancel can no longer reach them
+        return [(row, future) for row, future in batch if future.set_running_or_notify_cancel()]
+
+    def _score(self, batch):
+        results = self.predict_rows(np.array([row for row, _ in batch], dtype=np.float64))
+        self.batches += 1
+        self.items += len(batch)
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            if not batch:
+                continue
+            # A failing batch fails its own callers and never ends the thread
+            try:
+                self._score(batch)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def close(self):
+        """Answer what is queued, then stop the batching thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def stats(self):
+        return {'batches': self.batches, 'items': self.items,
+                'mean_batch': round(self.items / self.batches, 2) if self.batches else 0.0}
+
+
+# --- BENCHMARK ---
+def _hammer(predict, seconds, counts, rng):
+    done = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        predict([rng.uniform(0, 14), rng.uniform(0, 50000), rng.uniform(0, 20)])
+        done += 1
+    counts.append(done)
+
+
+def throughput(predict, concurrency, seconds):
+    counts = []
+    threads = [threading.Thread(target=_hammer, args=(predict, seconds, counts, np.random.default_rng(i)))
+               for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sum(counts) / seconds
+
+
+def main(argv=None):
+    from predictor import DEFAULT_MODEL, WaterPredictor
+
+    parser = argparse.ArgumentParser(description="Benchmark request coalescing against direct calls.")
+    parser.add_argument('--bench', action='store_true', help="Run the concurrency benchmark")
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--concurrency', default="1,2,4,8,16,32,64")
+    parser.add_argument('--max-wait-ms', type=float, default=2.0)
+    args = parser.parse_args(argv)
+    if not args.bench:
+        parser.print_help()
+        return
+
+    # Grid and cache off so every call reaches the forest
+    predictor = WaterPredictor.from_path(args.model, use_grid=False)
+    coalescer = PredictionCoalescer(predictor.predict_rows, max_wait=args.max_wait_ms / 1e3)
+
+    def direct(row):
+        return predictor.predict_rows([row])[0]
+
+    print(f"{'callers':>8} {'direct/s':>10} {'coalesced/s':>12} {'gain':>6} {'mean batch':>11}")
+    for concurrency in (int(c) for c in args.concurrency.split(',')):
+        base = throughput(direct, concurrency, args.seconds)
+        before = coalescer.stats()
+        merged = throughput(coalescer.predict, concurrency, args.seconds)
+        after = coalescer.stats()
+        mean_batch = (after['items'] - before['items']) / max(after['batches'] - before['batches'], 1)
+        print(f"{concurrency:>8} {base:>10,.0f} {merged:>12,.0f} {merged / base:>5.1f}x {mean_batch:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Shrink the forest: cap tree depth, merge redundant leaves, keep a subset of trees.
+
+With three input features the shipped forest is far bigger than its
+answers need: single-row latency grows with the number of trees times the
+depth, and size with the node count.  Compression works on FlatForest
+arrays, so it reads water_model.pkl or its .aqsf export alike:
+
+  1. depth cap: nodes at the cap become leaves with their own class mix
+     (sklearn stores it on every node, so no training data is needed);
+  2. leaf merge: sibling leaves with the same answer whose probabilities
+     differ by at most --merge-tol collapse into their parent, bottom-up;
+  3. tree subset: trees are added greedily, each time the one that best
+     restores the original forest's labels on reference inputs, until
+     --agreement is reached.
+
+Trees are chosen on one half of the reference inputs and every stage is
+reported on the other half: label agreement with the original, mean
+|difference| in P(potable), single-row latency, and bytes in memory and on
+disk.  The result is written as a memory-mapped .aqsf artifact.
+
+    python compress_forest.py --max-depth 16 --agreement 0.98
+    python model_registry.py publish water_model.compact.aqsf     # serve it
+"""
+import argparse
+import os
+import tempfile
+
+import numpy as np
+
+from forest_engine import FlatForest, sample_inputs
+from model_artifact import export_artifact
+from predictor import BASE_DIR, DEFAULT_MODEL, FEATURES, load_model, resolve_model_path
+from train_model import serving_cost
+
+DEFAULT_OUT = os.path.join(BASE_DIR, 'water_model.compact.aqsf')
+DEFAULT_MAX_DEPTH = 16
+DEFAULT_MERGE_TOL = 0.2
+DEFAULT_AGREEMENT = 0.98
+REFERENCE_ROWS = 40_000
+
+
+# --- 1. TREE SURGERY ---
+# Each step works on copies of the child arrays; a leaf is a node whose children point at itself
+def node_depths(roots, left, right):
+    depth = np.full(len(left), -1, np.int32)
+    frontier, d = np.asarray(roots), 0
+    while len(frontier):
+        depth[frontier] = d
+        inner = frontier[left[frontier] != frontier]
+        frontier = np.concatenate([left[inner], right[inner]])
+        d += 1
+    return depth
+
+
+def cap_depth(roots, left, right, max_depth):
+    left, right = left.copy(), right.copy()
+    at_cap = np.flatnonzero(node_depths(roots, left, right) == max_depth)
+    left[at_cap] = right[at_cap] = at_cap
+    return left, right
+
+
+def merge_leaves(roots, left, right, value, tol):
+    """Collapse sibling leaves that agree on the label and differ by <= tol; returns (left, right, merged)."""
+    left, right = left.copy(), right.copy()
+    depth = node_depths(roots, left, right)
+    node = np.arange(len(left))
+    merged = 0
+    # Deepest level first, so a merge can make its parent mergeable in turn
+    for d in range(depth.max() - 1, -1, -1):
+        inner = node[(depth == d) & (left != node)]
+        l, r = left[inner], right[inner]
+        both_leaves = (left[l] == l) & (left[r] == r)
+        close = np.abs(value[l] - value[r]).max(axis=1) <= tol
+        same = value[l].argmax(axis=1) == value[r].argmax(axis=1)
+        collapse = inner[both_leaves & close & same]
+        # The parent's class mix is the sample-weighted mix of its two children
+        left[collapse] = right[collapse] = collapse
+        merged += len(collapse)
+    return left, right, merged
+
+
+def rebuild(forest, left, right, trees=None):
+    """FlatForest of the chosen trees (default all), keeping only reachable nodes."""
+    roots = forest.roots if trees is None else forest.roots[np.sort(trees)]
+    keep = np.zeros(len(left), bool)
+    frontier, levels = roots, 0
+    while len(frontier):
+        keep[frontier] = True
+        inner = frontier[left[frontier] != frontier]
+        frontier = np.concatenate([left[inner], right[inner]])
+        levels += 1
+    # Trees stay contiguous and in order, so renumbering is a running count
+    index = (np.cumsum(keep) - 1).astype(np.int32)
+    leaf = (left == np.arange(len(left)))[keep]
+    return FlatForest(feature=np.where(leaf, 0, forest.feature[keep]).astype(np.int32),
+                      threshold=np.asarray(forest.threshold[keep]), left=index[left[keep]],
+                      right=index[right[keep]], missing_left=np.asarray(forest.missing_left[keep]),
+                      value=np.asarray(forest.value[keep]), roots=index[roots], classes=forest.classes_,
+                      max_depth=levels - 1)
+
+
+# --- 2. TREE SELECTION ---
+def select_trees(forest, X, target, agreement, max_trees=None):
+    """Greedy forward selection of trees whose mean best matches the target labels on X.
+
+    target holds class indices.  Each step adds the tree giving the highest
+    label agreement, breaking ties by the smallest change to the running mix,
+    and stops once `agreement` is reached.  Returns (trees, agreement reached).
+    """
+    values = forest.value[forest.apply(X)]  # (rows, trees, classes)
+    remaining = np.arange(forest.n_trees)
+    total = np.zeros((len(X), values.shape[2]))
+    chosen, reached = [], 0.0
+    max_trees = max_trees or forest.n_trees
+    while len(remaining) and len(chosen) < max_trees:
+        mix = total[:, None, :] + values[:, remaining, :]
+        agree = (mix.argmax(axis=2) == target[:, None]).mean(axis=0)
+        shift = np.abs(values[:, remaining, :] - (total / max(len(chosen), 1))[:, None, :]).mean(axis=(0, 2))
+        best = np.lexsort((shift, -agree))[0]
+        chosen.append(int(remaining[best]))
+        total += values[:, remaining[best], :]
+        remaining = np.delete(remaining, best)
+        reached = float(agree[best])
+        if reached >= agreement:
+            break
+    return chosen, reached
+
+
+# --- 3. REPORT ---
+def reference_inputs(data=None, n=REFERENCE_ROWS, seed=5):
+    """Dashboard-range inputs, plus the rows of a readings CSV when given, shuffled."""
+    X = sample_inputs(n, seed=seed)
+    if data:
+        import pandas as pd
+        X = np.vstack([X, pd.read_csv(data, usecols=FEATURES)[FEATURES].to_numpy(np.float64)])
+    return X[np.random.default_rng(seed).permutation(len(X))]
+
+
+def disk_bytes(forest):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'forest.aqsf')
+        export_artifact(forest, path)
+        return os.path.getsize(path)
+
+
+def evaluate(name, forest, original_proba, X):
+    proba = forest.predict_proba(X)
+    cost = serving_cost(forest)
+    return {'stage': name, 'trees': forest.n_trees, 'nodes': forest.n_nodes, 'depth': forest.max_depth,
+            'agreement': float((proba.argmax(axis=1) == original_proba.argmax(axis=1)).mean()),
+            'mean_dp': float(np.abs(proba - original_proba).max(axis=1).mean()),
+            'memory': forest.nbytes, 'disk': disk_bytes(forest), **cost}
+
+
+def print_report(rows, n_eval):
+    print(f"{'stage':<16} {'trees':>5} {'nodes':>9} {'depth':>5} {'agree':>8} {'mean|dp|':>8} "
+          f"{'p50 ms':>7} {'p99 ms':>7} {'1k rows':>8} {'memory':>8} {'disk':>8}")
+    for r in rows:
+        print(f"{r['stage']:<16} {r['trees']:>5} {r['nodes']:>9,} {r['depth']:>5} {r['agreement']:>8.2%} "
+              f"{r['mean_dp']:>8.4f} {r['p50_ms']:7.3f} {r['p99_ms']:7.3f} {r['batch_ms']:6.2f}ms "
+              f"{r['memory'] / 1e6:6.2f}MB {r['disk'] / 1e6:6.2f}MB")
+    print(f"agreement and |dp| on {n_eval:,} held-out reference rows; each stage includes the ones above it")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compress the forest and report what it costs in agreement.")
+    parser.add_argument('--model', default=DEFAULT_MODEL, help="water_model.pkl or an .aqsf artifact")
+    parser.add_argument('--out', default=DEFAULT_OUT, help="Where to write the compressed .aqsf")
+    parser.add_argument('--max-depth', type=int, default=DEFAULT_MAX_DEPTH, help="0 disables the cap")
+    parser.add_argument('--merge-tol', type=float, default=DEFAULT_MERGE_TOL,
+                        help="Largest probability gap between sibling leaves that still merge (-1 disables)")
+    parser.add_argument('--agreement', type=float, default=DEFAULT_AGREEMENT,
+                        help="Label agreement with the original at which tree selection stops")
+    parser.add_argument('--max-trees', type=int, help="Upper bound on the trees kept")
+    parser.add_argument('--data', help="Readings CSV to add to the reference inputs (ph, Solids, Turbidity)")
+    args = parser.parse_args(argv)
+
+    model = load_model(resolve_model_path(args.model))
+    original = model if isinstance(model, FlatForest) else FlatForest.from_sklearn(model)
+    X = reference_inputs(args.data)
+    X_select, X_eval = X[:len(X) // 2], X[len(X) // 2:]
+    target = original.predict_proba(X_select).argmax(axis=1)
+    original_proba = original.predict_proba(X_eval)
+
+    rows = [evaluate('original', original, original_proba, X_eval)]
+    left, right = np.asarray(original.left), np.asarray(original.right)
+    if args.max_depth:
+        left, right = cap_depth(original.roots, left, right, args.max_depth)
+        rows.append(evaluate(f'depth <= {args.max_depth}', rebuild(original, left, right), original_proba, X_eval))
+    if args.merge_tol >= 0:
+        left, right, merged = merge_leaves(original.roots, left, right, original.value, args.merge_tol)
+        rows.append(evaluate(f'merge {merged:,}', rebuild(original, left, right), original_proba, X_eval))
+    trees, reached = select_trees(rebuild(original, left, right), X_select, target, args.agreement, args.max_trees)
+    compact = rebuild(original, left, right, trees)
+    rows.append(evaluate(f'{len(trees)} of {original.n_trees} trees', compact, original_proba, X_eval))
+    print_report(rows, len(X_eval))
+    if reached < args.agreement:
+        print(f"Tree selection stopped at {reached:.2%} agreement, short of {args.agreement:.2%}")
+
+    header = export_artifact(compact, args.out, source={
+        'compressed_from': original.content_hash()[:12], 'max_depth': args.max_depth,
+        'merge_tol': args.merge_tol, 'trees': len(trees), 'agreement': round(rows[-1]['agreement'], 4)})
+    print(f"Wrote {args.out} (version {header['content_hash'][:12]}); "
+          f"serve it with: python model_registry.py publish {args.out}")
+
+
+if __name__ == "__main__":
+    main()
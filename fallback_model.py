@@ -0,0 +1,100 @@
+"""Seeded stand-in model, trained once and cached on disk.
+
+When no trained model file is available the dashboards and the model server
+score with a small fallback forest.  It used to be retrained from unseeded
+random data in every new process, which slowed every cold start and left
+replicas disagreeing with each other.  The build here seeds both the data
+and the forest, trains across all cores, and exports the result as a
+memory-mapped .aqsf artifact in .model_cache/.  The file is named after a
+hash of the training code and config, so a changed recipe never picks up a
+stale model.  Later processes map that file instead of training, and a file
+lock makes concurrent replicas wait for one build rather than each run their own.
+
+    python fallback_model.py            # build (or find) the cached model
+    python fallback_model.py --bench    # per-process retrain vs cached load
+"""
+import argparse
+import fcntl
+import hashlib
+import inspect
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from forest_engine import FlatForest
+from model_artifact import FORMAT_VERSION, export_artifact, load_artifact
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, '.model_cache')
+FALLBACK_CONFIG = {'n_samples': 100, 'n_estimators': 100, 'seed': 42}
+
+
+def train(config=FALLBACK_CONFIG):
+    from sklearn.ensemble import RandomForestClassifier
+
+    rng = np.random.default_rng(config['seed'])
+    X = rng.random((config['n_samples'], 3)) * np.array([14.0, 10.0, 35.0])
+    y = ((X[:, 0] > 6.5) & (X[:, 0] < 8.5) & (X[:, 1] < 5.0)).astype(int)
+    rf = RandomForestClassifier(n_estimators=config['n_estimators'], random_state=config['seed'], n_jobs=-1)
+    rf.fit(X, y)
+    return rf
+
+
+def cache_key(config=FALLBACK_CONFIG):
+    recipe = json.dumps({'code': inspect.getsource(train), 'config': config, 'format': FORMAT_VERSION},
+                        sort_keys=True)
+    return hashlib.sha256(recipe.encode('utf-8')).hexdigest()[:16]
+
+
+def fallback_path(config=FALLBACK_CONFIG, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, f"fallback-{cache_key(config)}.aqsf")
+
+
+def load_fallback_model(config=FALLBACK_CONFIG, cache_dir=CACHE_DIR):
+    """The cached fallback forest (a FlatForest), building it on first use."""
+    path = fallback_path(config, cache_dir)
+    if os.path.exists(path):
+        return load_artifact(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(path + '.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)  # another process may be building it right now
+        if not os.path.exists(path):
+            export_artifact(FlatForest.from_sklearn(train(config)), path,
+                            source={'fallback': cache_key(config), **config})
+    return load_artifact(path)
+
+
+# --- BENCHMARK ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or benchmark the cached fallback model.")
+    parser.add_argument('--bench', action='store_true', help="Compare training per process with loading the cache")
+    args = parser.parse_args(argv)
+
+    path = fallback_path()
+    cached = os.path.exists(path)
+    t0 = time.perf_counter()
+    model = load_fallback_model()
+    print(f"{path} ({'cached' if cached else 'built'} in {(time.perf_counter() - t0) * 1e3:.0f} ms, "
+          f"version {model.content_hash()[:12]})")
+    if not args.bench:
+        return
+
+    # Fresh interpreters, as a new replica would be: the old path paid for sklearn and training every time
+    for label, code in (("retrain per process (old)", "from fallback_model import train; train()"),
+                        ("load the cached model", "from fallback_model import load_fallback_model; load_fallback_model()")):
+        runs = []
+        for _ in range(3):
+            t0 = time.perf_counter()
+            subprocess.run([sys.executable, '-c', code], cwd=BASE_DIR, check=True)
+            runs.append((time.perf_counter() - t0) * 1e3)
+        print(f"{label:<27} {min(runs):7.0f} ms per process (best of 3, {os.cpu_count()} cores)")
+    again = FlatForest.from_sklearn(train()).content_hash() == model.content_hash()
+    print(f"retraining reproduces the cached model: {again}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""Flattened NumPy inference engine for the Random Forest.
+
+FlatForest copies every tree of a fitted sklearn forest into one set of
+contiguous node arrays (feature, threshold, left, right, value) and walks all
+trees at once with vectorized NumPy indexing.  It reproduces sklearn's
+predict_proba bit for bit: inputs are compared as float32, NaNs follow each
+node's missing-value direction, and per-tree probabilities are summed in tree
+order before dividing by the number of trees.
+
+Its win is per-call overhead: a one-row call skips sklearn's validation and
+joblib dispatch.  For large batches sklearn's compiled tree walk is faster, so
+WaterPredictor only routes small batches here.
+
+    python forest_engine.py --model water_model.pkl    # parity check + latency table
+"""
+import argparse
+import hashlib
+import time
+
+import numpy as np
+
+# Rows walked per vectorized pass; keeps the (rows x trees) index arrays small
+CHUNK_ROWS = 16384
+
+
+class FlatForest:
+    def __init__(self, feature, threshold, left, right, missing_left, value, roots, classes, max_depth,
+                 is_leaf=None, children=None, threshold32=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.classes_ = np.asarray(classes)
+        self.max_depth = int(max_depth)
+
+        # Derived walking tables (passed in when loaded from a mapped artifact):
+        # child = children[2 * node + went_right]
+        if is_leaf is None:
+            is_leaf = left == np.arange(len(left), dtype=left.dtype)
+        if children is None:
+            children = np.stack([left, right], axis=1).ravel()
+        if threshold32 is None:
+            # Largest float32 <= each threshold, so x32 <= t32 exactly when
+            # x32 <= t64 and the whole walk can stay in float32
+            threshold32 = threshold.astype(np.float32)
+            over = threshold32.astype(np.float64) > threshold
+            threshold32[over] = np.nextafter(threshold32[over], np.float32(-np.inf))
+        self.is_leaf = is_leaf
+        self.children = children
+        self.threshold32 = threshold32
+
+    # Arrays that fully describe the forest, in artifact order
+    ARRAYS = ('feature', 'threshold', 'left', 'right', 'missing_left', 'value', 'roots',
+              'is_leaf', 'children', 'threshold32')
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.ARRAYS)
+
+    def content_hash(self):
+        digest = hashlib.sha256()
+        for name in self.ARRAYS:
+            array = getattr(self, name)
+            digest.update(np.ascontiguousarray(array, dtype=array.dtype.newbyteorder('<')).tobytes())
+        return digest.hexdigest()
+
+    @classmethod
+    def from_sklearn(cls, model):
+        estimators = getattr(model, 'estimators_', None)
+        if not estimators or getattr(model, 'n_outputs_', 1) != 1:
+            raise TypeError("FlatForest needs a fitted single-output forest classifier")
+        import sklearn  # after the check: non-sklearn models never pay for the import
+
+        # sklearn >= 1.4 stores leaf class fractions in tree_.value; older
+        # versions store counts and normalize inside predict_proba.
+        major, minor = (int(p) for p in sklearn.__version__.split('.')[:2])
+        stored_as_fractions = (major, minor) >= (1, 4)
+        n_classes = len(model.classes_)
+
+        parts = {k: [] for k in ('feature', 'threshold', 'left', 'right', 'missing_left', 'value')}
+        roots = []
+        offset = 0
+        max_depth = 0
+        for est in estimators:
+            tree = est.tree_
+            n = tree.node_count
+            idx = np.arange(offset, offset + n, dtype=np.int32)
+            leaf = tree.children_left == -1
+            # Leaves point at themselves; that self-loop is how is_leaf finds them
+            parts['left'].append(np.where(leaf, idx, tree.children_left + offset).astype(np.int32))
+            parts['right'].append(np.where(leaf, idx, tree.children_right + offset).astype(np.int32))
+            parts['feature'].append(np.where(leaf, 0, tree.feature).astype(np.int32))
+            parts['threshold'].append(tree.threshold.astype(np.float64))
+            missing = getattr(tree, 'missing_go_to_left', None)
+            parts['missing_left'].append(np.zeros(n, dtype=bool) if missing is None else missing.astype(bool))
+            value = tree.value[:, 0, :n_classes].astype(np.float64)
+            if not stored_as_fractions:
+                normalizer = value.sum(axis=1)[:, np.newaxis]
+                normalizer[normalizer == 0.0] = 1.0
+                value = value / normalizer
+            parts['value'].append(value)
+            roots.append(offset)
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        arrays = {k: np.ascontiguousarray(np.concatenate(v)) for k, v in parts.items()}
+        return cls(roots=np.asarray(roots, dtype=np.int32), classes=model.classes_,
+                   max_depth=max_depth, **arrays)
+
+    def apply(self, X):
+        """Leaf index of every row in every tree, shape (n_rows, n_trees)."""
+        X = np.asarray(X, dtype=np.float32)
+        n, n_features = X.shape
+        flat_x = X.ravel()
+        has_nan = bool(np.isnan(flat_x).any())
+
+        # Walk (row, tree) pairs together and drop each one as it reaches a leaf
+        out = np.tile(self.roots, n)
+        pos = np.flatnonzero(~self.is_leaf[out])
+        cur = out[pos]
+        base = (pos // self.n_trees) * n_features
+        while len(cur):
+            x = flat_x[base + self.feature[cur]]
+            went_right = ~(x <= self.threshold32[cur])
+            if has_nan:
+                went_right = np.where(np.isnan(x), ~self.missing_left[cur], went_right)
+            step = self.children[2 * cur + went_right]
+            leaf = self.is_leaf[step]
+            out[pos[leaf]] = step[leaf]
+            keep = ~leaf
+            cur, pos, base = step[keep], pos[keep], base[keep]
+        return out.reshape(n, self.n_trees)
+
+    def predict_proba(self, X):
+        # Same float32 cast sklearn applies before walking the trees
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        out = np.empty((len(X), self.value.shape[1]), dtype=np.float64)
+        for start in range(0, len(X), CHUNK_ROWS):
+            leaves = self.apply(X[start:start + CHUNK_ROWS])
+            proba = np.zeros((len(leaves), self.value.shape[1]), dtype=np.float64)
+            # Accumulate tree by tree, in the same order as sklearn, so the
+            # floating-point sum is identical
+            for t in range(self.n_trees):
+                proba += self.value[leaves[:, t]]
+            proba /= self.n_trees
+            out[start:start + len(leaves)] = proba
+        return out
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+# --- PARITY CHECK AND LATENCY COMPARISON ---
+def sample_inputs(n, seed=0):
+    # Uniform over the dashboard input ranges: pH 0-14, TDS 0-50000 ppm, turbidity 0-20 NTU
+    rng = np.random.default_rng(seed)
+    return np.column_stack([rng.uniform(0, 14, n), rng.uniform(0, 50000, n), rng.uniform(0, 20, n)])
+
+
+def check_parity(model, engine, n=100_000):
+    X = sample_inputs(n, seed=1)
+    expected = model.predict_proba(X)
+    got = engine.predict_proba(X)
+    return np.array_equal(expected, got), float(np.abs(expected - got).max())
+
+
+def best_time(fn, X, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn(X)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def latency_table(model, engine, sizes=(1, 1_000, 1_000_000)):
+    rows = []
+    for n in sizes:
+        X = sample_inputs(n, seed=2)
+        repeats = 50 if n <= 1_000 else 1
+        rows.append((n, best_time(model.predict_proba, X, repeats), best_time(engine.predict_proba, X, repeats)))
+    return rows
+
+
+def main(argv=None):
+    from predictor import DEFAULT_MODEL, load_model
+
+    parser = argparse.ArgumentParser(description="Check FlatForest against sklearn and compare latency.")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Path to water_model.pkl")
+    parser.add_argument("--sizes", default="1,1000,1000000", help="Comma-separated batch sizes to time")
+    args = parser.parse_args(argv)
+
+    model = load_model(args.model)
+    t0 = time.perf_counter()
+    engine = FlatForest.from_sklearn(model)
+    print(f"Flattened {engine.n_trees} trees / {engine.n_nodes:,} nodes "
+          f"({engine.nbytes / 1e6:.1f} MB) in {(time.perf_counter() - t0) * 1e3:.1f} ms")
+
+    identical, max_diff = check_parity(model, engine)
+    print(f"Parity on 100,000 rows: {'identical' if identical else 'MISMATCH'} (max |diff| = {max_diff:.3g})")
+
+    print(f"{'rows':>10} {'sklearn':>12} {'FlatForest':>12} {'speedup':>8}")
+    for n, t_sk, t_flat in latency_table(model, engine, [int(s) for s in args.sizes.split(',')]):
+        print(f"{n:>10,} {t_sk * 1e3:>10.2f}ms {t_flat * 1e3:>10.2f}ms {t_sk / t_flat:>7.1f}x")
+    if not identical:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Shared, persistent prediction history.
+
+One SQLite file in WAL mode holds every prediction from every dashboard
+session and from the sensor ingestion server, so history survives
+reconnects and restarts and readers never block the writer.  Appends are
+queued and committed in batches by a background writer thread.  Reads fetch
+one page at a time with a keyset cursor over indexed columns, so a page costs
+the same at 10 rows or 10 million.
+
+    python history_store.py --bench 2000000     # fill, then time page queries
+"""
+import argparse
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB = os.path.join(BASE_DIR, 'history.db')
+
+COLUMNS = ('ts', 'device', 'ph', 'solids', 'turbidity', 'label', 'confidence', 'model_version')
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    device TEXT NOT NULL,
+    ph REAL,
+    solids REAL,
+    turbidity REAL,
+    label INTEGER NOT NULL,
+    confidence REAL NOT NULL,
+    model_version TEXT
+);
+CREATE INDEX IF NOT EXISTS predictions_ts ON predictions (ts, id);
+CREATE INDEX IF NOT EXISTS predictions_device_ts ON predictions (device, ts, id);
+CREATE INDEX IF NOT EXISTS predictions_label_ts ON predictions (label, ts, id);
+"""
+INSERT = f"INSERT INTO predictions ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+
+class HistoryStore:
+    def __init__(self, path=DEFAULT_DB, batch_size=1000, flush_interval=0.25):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.commits = 0
+        self.errors = 0
+        self.dropped = 0
+        self._local = threading.local()
+        self._queue = queue.Queue()
+        conn = sqlite3.connect(path)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript(SCHEMA)
+        conn.close()
+        self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+        self._thread.start()
+
+    # --- writes ---
+    def append(self, ts, device, ph, solids, turbidity, label, confidence, model_version=None):
+        self._queue.put([(ts, device, ph, solids, turbidity, label, confidence, model_version)])
+
+    def append_many(self, rows):
+        # rows: iterables in COLUMNS order
+        self._queue.put(list(rows))
+
+    def flush(self):
+        """Block until everything appended so far is committed."""
+        self._queue.join()
+
+    def _run(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute('PRAGMA synchronous=NORMAL')  # safe in WAL mode; skips an fsync per commit
+        while True:
+            items = [self._queue.get()]
+            rows = list(items[0])
+            deadline = time.monotonic() + self.flush_interval
+            while len(rows) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+                rows.extend(items[-1])
+            try:
+                with conn:
+                    conn.executemany(INSERT, rows)
+                self.written += len(rows)
+                self.commits += 1
+            except sqlite3.Error:
+                self.errors += 1
+                self._write_rows(conn, rows)
+            for _ in items:
+                self._queue.task_done()
+
+    def _write_rows(self, conn, rows):
+        # A failed batch rolls back whole; retry it one row at a time so only the bad rows are lost
+        written = 0
+        try:
+            with conn:
+                for row in rows:
+                    try:
+                        conn.execute(INSERT, row)
+                        written += 1
+                    except sqlite3.Error:
+                        self.dropped += 1
+        except sqlite3.Error:
+            self.dropped += written  # the commit itself failed
+            return
+        self.written += written
+        self.commits += 1
+
+    # --- reads ---
+    def _reader(self):
+        # One connection per thread (Streamlit runs each session on its own)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path)
+            conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def _where(device, label):
+        clauses, params = [], []
+        if device is not None:
+            clauses.append('device = ?')
+            params.append(device)
+        if label is not None:
+            clauses.append('label = ?')
+            params.append(label)
+        return clauses, params
+
+    def page(self, limit=20, before=None, device=None, label=None):
+        """Newest-first page of rows older than the cursor `before`.
+
+        Returns (rows, cursor); pass cursor back as `before` for the next page.
+        cursor is None on the last page.
+        """
+        clauses, params = self._where(device, label)
+        if before is not None:
+            clauses.append('(ts, id) < (?, ?)')
+            params.extend(before)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        rows = self._reader().execute(
+            f"SELECT id, {', '.join(COLUMNS)} FROM predictions {where} ORDER BY ts DESC, id DESC LIMIT ?",
+            params + [limit]).fetchall()
+        cursor = (rows[-1]['ts'], rows[-1]['id']) if len(rows) == limit else None
+        return [dict(row) for row in rows], cursor
+
+    def count(self, device=None, label=None):
+        clauses, params = self._where(device, label)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        return self._reader().execute(f"SELECT COUNT(*) FROM predictions {where}", params).fetchone()[0]
+
+    def series(self, device, after, limit=100_000):
+        """Oldest-first readings of one device after the cursor `after` = (ts, id).
+
+        Returns (ids, values) as NumPy arrays; values columns are ts, ph,
+        solids, turbidity.  Walks the (device, ts, id) index.
+        """
+        cur = self._reader().cursor()
+        cur.row_factory = None  # plain tuples straight into NumPy
+        rows = cur.execute(
+            "SELECT id, ts, ph, solids, turbidity FROM predictions "
+            "WHERE device = ? AND (ts, id) > (?, ?) ORDER BY ts, id LIMIT ?",
+            (device, after[0], after[1], limit)).fetchall()
+        if not rows:
+            return np.empty(0, np.int64), np.empty((0, 4))
+        data = np.array(rows, dtype=np.float64)
+        return data[:, 0].astype(np.int64), data[:, 1:]
+
+    def devices(self):
+        # DISTINCT would scan the whole index; hop from one device to the next instead
+        return [row[0] for row in self._reader().execute(
+            "WITH RECURSIVE d(device) AS ("
+            " SELECT MIN(device) FROM predictions"
+            " UNION ALL SELECT (SELECT MIN(device) FROM predictions WHERE device > d.device)"
+            " FROM d WHERE d.device IS NOT NULL)"
+            " SELECT device FROM d WHERE device IS NOT NULL")]
+
+    def stats(self):
+        return {'written': self.written, 'commits': self.commits, 'errors': self.errors,
+                'dropped': self.dropped, 'queued': self._queue.qsize()}
+
+
+# --- BENCHMARK ---
+def _timed(fn, repeat=50):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - t0) / repeat * 1e3, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the shared prediction history store.")
+    parser.add_argument('--bench', type=int, metavar='ROWS', help="Fill a scratch database with ROWS rows and time queries")
+    parser.add_argument('--db', default=os.path.join(BASE_DIR, 'history_bench.db'))
+    args = parser.parse_args(argv)
+    if not args.bench:
+        parser.print_help()
+        return
+
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(args.db + suffix):
+            os.remove(args.db + suffix)
+    store = HistoryStore(args.db, batch_size=50_000)
+    rng = np.random.default_rng(0)
+    t0 = time.perf_counter()
+    now = time.time()
+    for start in range(0, args.bench, 100_000):
+        n = min(100_000, args.bench - start)
+        ts = now - args.bench + start + np.arange(n)
+        store.append_many(zip(ts.tolist(), [f"esp32-{d:02d}" for d in rng.integers(0, 50, n)],
+                              rng.uniform(0, 14, n).tolist(), rng.uniform(0, 50000, n).tolist(),
+                              rng.uniform(0, 10, n).tolist(), rng.integers(0, 2, n).tolist(),
+                              rng.uniform(0.5, 1, n).tolist(), ['bench'] * n))
+    store.flush()
+    fill = time.perf_counter() - t0
+    print(f"appended {store.written:,} rows in {fill:.1f}s ({store.written / fill:,.0f} rows/s, {store.commits} commits)")
+
+    first_ms, (_, cursor) = _timed(lambda: store.page(20))
+    deep = cursor
+    for _ in range(500):  # walk 500 pages in, then time one more
+        _, deep = store.page(20, before=deep)
+    deep_ms, _ = _timed(lambda: store.page(20, before=deep))
+    device_ms, _ = _timed(lambda: store.page(20, device='esp32-07'))
+    label_ms, _ = _timed(lambda: store.page(20, label=1))
+    both_ms, _ = _timed(lambda: store.page(20, device='esp32-07', label=1))
+    count_ms, total = _timed(lambda: store.count(device='esp32-07'), repeat=5)
+    print(f"page 1:                {first_ms:.3f} ms")
+    print(f"page 502 (cursor):     {deep_ms:.3f} ms")
+    print(f"device filter:         {device_ms:.3f} ms")
+    print(f"result filter:         {label_ms:.3f} ms")
+    print(f"device+result filter:  {both_ms:.3f} ms")
+    print(f"count(device):         {count_ms:.1f} ms ({total:,} rows)")
+    for suffix in ('', '-wal', '-shm'):
+        os.remove(args.db + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""Paged history table for the dashboards.
+
+HistoryView replaces the per-session list of dicts.  Predictions go into a
+fixed-capacity ring buffer backed by a NumPy structured array (raw readings,
+a uint8 label and the confidence; no strings), so a session's history has a
+hard memory ceiling and the oldest entries drop off once it is full.  A rerun
+formats and builds a DataFrame for the visible page only and colors the
+Result column with one vectorized rule per column instead of a Python call
+per cell, so the cost of showing history stays flat as it grows.
+
+    python history_view.py --bench      # old full-rebuild path vs paged view
+    python history_view.py --memory     # bytes per entry: dicts, lists, ring
+"""
+import argparse
+import math
+import time
+from datetime import datetime
+
+import numpy as np
+import streamlit as st
+
+RESULT_COLORS = {'POTABLE (SAFE)': 'color: #00ff88', 'NOT POTABLE (UNSAFE)': 'color: #ff4d4d'}
+PAGE_SIZE = 20
+DEFAULT_CAPACITY = 10_000
+
+# One history entry: epoch milliseconds, readings, label, confidence (25 bytes)
+ENTRY = np.dtype([('ts', '<i8'), ('ph', '<f4'), ('solids', '<f4'), ('turbidity', '<f4'),
+                  ('label', 'u1'), ('confidence', '<f4')])
+
+
+def _result_rule(column):
+    return np.select([column.eq(value).to_numpy() for value in RESULT_COLORS], list(RESULT_COLORS.values()), '')
+
+
+def style_results(frame, column='Result'):
+    return frame.style.apply(_result_rule, subset=[column])
+
+
+class HistoryView:
+    """Last `capacity` predictions of a session in a NumPy ring buffer.
+
+    Entries are raw values (25 bytes each); Time, Result and Conf. strings are
+    made only for the rows on the visible page.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, page_size=PAGE_SIZE):
+        self.capacity = capacity
+        self.page_size = page_size
+        self.total = 0  # ever appended; len() is what is still kept
+        self._buf = np.zeros(capacity, dtype=ENTRY)
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def append(self, ts, ph, solids, turbidity, label, confidence):
+        self._buf[self.total % self.capacity] = (int(ts * 1000), ph, solids, turbidity, label, confidence)
+        self.total += 1
+
+    @property
+    def pages(self):
+        return max(1, math.ceil(len(self) / self.page_size))
+
+    def newest(self, n, skip=0):
+        """Up to n entries, newest first, after skipping the `skip` newest."""
+        n = max(min(n, len(self) - skip), 0)
+        return self._buf[(self.total - 1 - skip - np.arange(n)) % self.capacity]
+
+    def window(self, page=0):
+        """Page `page` (0 = newest) as a display DataFrame, newest row first."""
+        import pandas as pd  # only once a table is shown, not at app start
+
+        rows = self.newest(self.page_size, page * self.page_size)
+        return pd.DataFrame({
+            'Time': [datetime.fromtimestamp(ms / 1000).strftime("%H:%M:%S") for ms in rows['ts'].tolist()],
+            'pH': rows['ph'].astype(np.float64).round(2),
+            'Solids': rows['solids'].astype(np.float64).round(1),
+            'Turbidity': rows['turbidity'].astype(np.float64).round(2),
+            'Result': np.where(rows['label'] == 1, 'POTABLE (SAFE)', 'NOT POTABLE (UNSAFE)'),
+            'Conf.': np.char.mod('%.1f%%', rows['confidence'] * 100),
+        })
+
+
+def show_table(frame):
+    st.dataframe(style_results(frame), use_container_width=True, hide_index=True)
+
+
+def pager(page_label, newer=None, older=None):
+    """Newer/Older buttons; each of newer/older is an on_click callback, or None when there is no such page."""
+    col_prev, col_page, col_next = st.columns([1, 4, 1])
+    col_prev.button("◀ Newer", disabled=newer is None, on_click=newer)
+    col_page.caption(page_label)
+    col_next.button("Older ▶", disabled=older is None, on_click=older)
+
+
+def render_history(view, state_key='history_page'):
+    """Visible page of a HistoryView plus its pager; the page number lives in session state."""
+    page = min(st.session_state.get(state_key, 0), view.pages - 1)
+
+    def go(to):
+        return lambda: st.session_state.__setitem__(state_key, to)
+
+    show_table(view.window(page))
+    dropped = view.total - len(view)
+    pager(f"Page {page + 1} of {view.pages} · {len(view):,} predictions"
+          + (f" (oldest {dropped:,} dropped)" if dropped else ""),
+          newer=go(page - 1) if page > 0 else None,
+          older=go(page + 1) if page + 1 < view.pages else None)
+
+
+# --- BENCHMARK ---
+def _sample_entries(n, rng):
+    # (ts, ph, solids, turbidity, label, confidence) as the dashboard produces them
+    t0 = time.time() - n
+    return list(zip((t0 + np.arange(n)).tolist(), rng.uniform(0, 14, n).tolist(), rng.uniform(0, 50000, n).tolist(),
+                    rng.uniform(0, 10, n).tolist(), rng.integers(0, 2, n).tolist(), rng.uniform(0.5, 1, n).tolist()))
+
+
+def _as_record(ts, ph, solids, turbidity, label, confidence):
+    # The dict the dashboards used to keep per prediction
+    return {'Time': datetime.fromtimestamp(ts).strftime("%H:%M:%S"), 'pH': ph, 'Solids': solids,
+            'Turbidity': turbidity, 'Result': "POTABLE (SAFE)" if label == 1 else "NOT POTABLE (UNSAFE)",
+            'Conf.': f"{confidence * 100:.1f}%"}
+
+
+def _serialize(styler):
+    # What st.dataframe does with a Styler: compute the styles, ship the frame as Arrow
+    from streamlit.dataframe_util import convert_pandas_df_to_arrow_bytes
+    styler._compute()
+    return len(convert_pandas_df_to_arrow_bytes(styler.data))
+
+
+def _old_rerun(history):
+    import pandas as pd
+    frame = pd.DataFrame(history)
+    return _serialize(frame.style.map(
+        lambda x: 'color: #00ff88' if x == 'POTABLE (SAFE)' else ('color: #ff4d4d' if x == 'NOT POTABLE (UNSAFE)' else ''),
+        subset=['Result']))
+
+
+def _new_rerun(view):
+    return _serialize(style_results(view.window(0)))
+
+
+def _allocated(build):
+    # Bytes still allocated by what build() returns
+    import tracemalloc
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def _columnar(entries):
+    # The column-of-lists layout HistoryView used before the ring buffer
+    columns = {name: [] for name in ('Time', 'pH', 'Solids', 'Turbidity', 'Result', 'Conf.')}
+    for entry in entries:
+        for name, value in _as_record(*entry).items():
+            columns[name].append(value)
+    return columns
+
+
+def _ring(entries):
+    view = HistoryView(capacity=len(entries))
+    for entry in entries:
+        view.append(*entry)
+    return view
+
+
+def memory_report(n, rng):
+    entries = _sample_entries(n, rng)
+    print(f"bytes per entry over {n:,} predictions")
+    for name, build in (("list of dicts", lambda: [_as_record(*e) for e in entries]),
+                        ("column lists", lambda: _columnar(entries)),
+                        ("ring buffer", lambda: _ring(entries))):
+        print(f"  {name:<14} {_allocated(build) / n:>8.1f}")
+    print(f"  (dtype itemsize {ENTRY.itemsize} B; capacity {DEFAULT_CAPACITY:,} = "
+          f"{DEFAULT_CAPACITY * ENTRY.itemsize / 1024:,.0f} KiB per session)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the history table rerun cost and memory.")
+    parser.add_argument('--bench', action='store_true')
+    parser.add_argument('--memory', action='store_true')
+    parser.add_argument('--sizes', default="100,1000,10000,100000")
+    args = parser.parse_args(argv)
+    if not (args.bench or args.memory):
+        parser.print_help()
+        return
+
+    rng = np.random.default_rng(0)
+    if args.memory:
+        memory_report(max(int(s) for s in args.sizes.split(',')), rng)
+    if not args.bench:
+        return
+    print(f"{'rows':>8} {'list+map ms':>12} {'bytes':>10} {'view ms':>9} {'bytes':>7} {'append us':>10}")
+    for n in (int(s) for s in args.sizes.split(',')):
+        entries = _sample_entries(n, rng)
+        records = [_as_record(*entry) for entry in entries]
+        view = HistoryView(capacity=max(n, DEFAULT_CAPACITY))
+        t0 = time.perf_counter()
+        for entry in entries:
+            view.append(*entry)
+        append_us = (time.perf_counter() - t0) / n * 1e6
+        repeat = max(3, 2000 // n)
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            old_bytes = _old_rerun(records)
+        old_ms = (time.perf_counter() - t0) / repeat * 1e3
+        t0 = time.perf_counter()
+        for _ in range(50):
+            new_bytes = _new_rerun(view)
+        new_ms = (time.perf_counter() - t0) / 50 * 1e3
+        print(f"{n:>8,} {old_ms:>12.1f} {old_bytes:>10,} {new_ms:>9.2f} {new_bytes:>7,} {append_us:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Resized, recompressed image variants for the dashboards.
+
+Images are located once per server process, and each is turned into WebP
+and JPEG (PNG when it has transparency) at a few widths, kept in
+static/img/ under names carrying the source's content hash.  The apps embed
+them with a <picture> srcset, so the browser downloads only the variant that
+fits the layout width, from app/static/ (see build_assets.py for why
+only images are served from there).
+
+    python image_assets.py image.png logo.png   # pre-generate, print sizes
+"""
+import argparse
+import functools
+import glob
+import hashlib
+import html
+import io
+import os
+
+from PIL import Image
+
+from build_assets import STATIC_DIR, STATIC_URL
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+IMAGE_DIR = os.path.join(STATIC_DIR, 'img')
+WIDTHS = (320, 640, 960, 1280)
+QUALITY = {'webp': 78, 'jpeg': 82}
+MIME = {'webp': 'image/webp', 'jpeg': 'image/jpeg', 'png': 'image/png'}
+
+
+def source_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+@functools.lru_cache(maxsize=None)
+def resolve(*candidates):
+    # First existing file among candidates (relative to the repo); probed once
+    for name in candidates:
+        path = os.path.join(BASE_DIR, name)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _encode(img, fmt):
+    buf = io.BytesIO()
+    if fmt == 'png':
+        img.save(buf, 'PNG', optimize=True)
+    elif fmt == 'jpeg':
+        img.convert('RGB').save(buf, 'JPEG', quality=QUALITY['jpeg'], optimize=True, progressive=True)
+    else:
+        img.save(buf, 'WEBP', quality=QUALITY['webp'], method=6)
+    return buf.getvalue()
+
+
+def build_variants(path):
+    """{format: [(width, filename), ...]} for path, generating missing files."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    digest = source_hash(path)
+    with Image.open(path) as src:
+        src.load()
+        has_alpha = src.mode in ('RGBA', 'LA') or 'transparency' in src.info
+        img = src.convert('RGBA' if has_alpha else 'RGB')
+    fallback = 'png' if has_alpha else 'jpeg'
+    # Never upscale; the source width is always one of the variants
+    widths = sorted({w for w in WIDTHS if w < img.width} | {img.width})
+
+    os.makedirs(IMAGE_DIR, exist_ok=True)
+    variants = {'webp': [], fallback: []}
+    for width in widths:
+        resized = None
+        for fmt in variants:
+            filename = f"{stem}.{digest}.{width}w.{'jpg' if fmt == 'jpeg' else fmt}"
+            out = os.path.join(IMAGE_DIR, filename)
+            if not os.path.exists(out):
+                if resized is None:
+                    height = round(img.height * width / img.width)
+                    resized = img if width == img.width else img.resize((width, height), Image.LANCZOS)
+                tmp = out + '.tmp'
+                with open(tmp, 'wb') as f:
+                    f.write(_encode(resized, fmt))
+                os.replace(tmp, out)
+            variants[fmt].append((width, filename))
+
+    # Variants of an older version of this image
+    for old in glob.glob(os.path.join(IMAGE_DIR, f"{glob.escape(stem)}.*")):
+        if os.path.basename(old).split('.')[1] != digest:
+            os.remove(old)
+    return variants
+
+
+@functools.lru_cache(maxsize=None)
+def picture(path, sizes='100vw', alt=''):
+    """<picture> HTML for st.markdown(..., unsafe_allow_html=True), or None without an image.
+
+    sizes is the HTML sizes attribute: the width the image is laid out at.
+    """
+    if path is None:
+        return None
+    variants = build_variants(path)
+    sources = []
+    img_tag = ''
+    for fmt, entries in variants.items():
+        srcset = ", ".join(f"{STATIC_URL}img/{filename} {width}w" for width, filename in entries)
+        if fmt == 'webp':
+            sources.append(f'<source type="{MIME[fmt]}" srcset="{srcset}" sizes="{sizes}">')
+        else:
+            width, filename = entries[-1]
+            img_tag = (f'<img src="{STATIC_URL}img/{filename}" srcset="{srcset}" sizes="{sizes}" '
+                       f'alt="{html.escape(alt)}" style="width:100%;height:auto;border-radius:8px;">')
+    return f'<picture>{"".join(sources)}{img_tag}</picture>'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-generate responsive image variants.")
+    parser.add_argument('images', nargs='*', default=['image.png', 'logo.png', 'IMG-20260216-WA0013.jpg'])
+    args = parser.parse_args(argv)
+
+    for name in args.images:
+        path = resolve(name)
+        if path is None:
+            print(f"{name}: not found, skipped")
+            continue
+        print(f"{name}: {os.path.getsize(path):,} B source")
+        for fmt, entries in build_variants(path).items():
+            for width, filename in entries:
+                size = os.path.getsize(os.path.join(IMAGE_DIR, filename))
+                print(f"  {fmt:<5} {width:>5}w  {size:>9,} B  static/img/{filename}")
+
+
+if __name__ == "__main__":
+    main()
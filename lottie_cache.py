@@ -0,0 +1,161 @@
+"""Disk cache for Lottie animation JSON.
+
+load_lottie() never touches the network on the caller's thread: it answers
+from memory, then the disk cache, then a copy bundled in assets/lottie/, and
+when the cached copy is older than its TTL (or missing) it starts one
+background refresh.  Refreshes revalidate with ETag / Last-Modified, so an
+unchanged animation costs a 304.  Failed refreshes back off before retrying.
+
+    python lottie_cache.py https://assets5.lottiefiles.com/packages/lf20_V9t630.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, '.lottie_cache')
+BUNDLED_DIR = os.path.join(BASE_DIR, 'assets', 'lottie')
+DEFAULT_TTL = 24 * 3600
+RETRY_AFTER = 300
+FETCH_TIMEOUT = 5
+
+
+def _is_lottie(doc):
+    return isinstance(doc, dict) and 'layers' in doc and 'op' in doc
+
+
+class LottieCache:
+    def __init__(self, cache_dir=CACHE_DIR, ttl=DEFAULT_TTL, retry_after=RETRY_AFTER):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self._memory = {}      # url -> (doc, meta)
+        self._refreshing = set()
+        self._next_attempt = {}
+        self._lock = threading.Lock()
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, key + '.json'), os.path.join(self.cache_dir, key + '.meta.json')
+
+    def _read_disk(self, url):
+        data_path, meta_path = self._paths(url)
+        try:
+            with open(data_path) as f:
+                doc = json.load(f)
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return (doc, meta) if _is_lottie(doc) else None
+
+    def _write_disk(self, url, doc, meta):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for path, payload in zip(self._paths(url), (doc, meta)):
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(payload, f)
+            os.replace(tmp, path)
+
+    def get(self, url, bundled=None):
+        """Animation JSON for url, or None; never waits on the network."""
+        with self._lock:
+            entry = self._memory.get(url)
+        if entry is None:
+            entry = self._read_disk(url)
+            if entry is not None:
+                with self._lock:
+                    self._memory[url] = entry
+        if entry is None or time.time() - entry[1].get('fetched', 0) > self.ttl:
+            self.refresh_async(url)
+        if entry is not None:
+            return entry[0]
+        return load_bundled(bundled) if bundled else None
+
+    def refresh_async(self, url):
+        now = time.time()
+        with self._lock:
+            if url in self._refreshing or now < self._next_attempt.get(url, 0):
+                return None
+            self._refreshing.add(url)
+        thread = threading.Thread(target=self._refresh, args=(url,), name='lottie-refresh', daemon=True)
+        thread.start()
+        return thread
+
+    def _refresh(self, url):
+        import requests
+
+        try:
+            with self._lock:
+                entry = self._memory.get(url)
+            entry = entry or self._read_disk(url)
+            headers = {}
+            if entry is not None:
+                if entry[1].get('etag'):
+                    headers['If-None-Match'] = entry[1]['etag']
+                if entry[1].get('last_modified'):
+                    headers['If-Modified-Since'] = entry[1]['last_modified']
+            r = requests.get(url, headers=headers, timeout=FETCH_TIMEOUT)
+            if r.status_code == 304 and entry is not None:
+                doc, meta = entry[0], dict(entry[1], fetched=time.time())
+            elif r.status_code == 200 and _is_lottie(r.json()):
+                doc = r.json()
+                meta = {'url': url, 'etag': r.headers.get('ETag'),
+                        'last_modified': r.headers.get('Last-Modified'), 'fetched': time.time()}
+            else:
+                raise ValueError(f"HTTP {r.status_code} or not a Lottie document")
+            self._write_disk(url, doc, meta)
+            with self._lock:
+                self._memory[url] = (doc, meta)
+                self._next_attempt.pop(url, None)
+        except Exception:
+            # Offline or bad response: keep serving what we have, try again later
+            with self._lock:
+                self._next_attempt[url] = time.time() + self.retry_after
+        finally:
+            with self._lock:
+                self._refreshing.discard(url)
+
+
+_bundled = {}
+
+
+def load_bundled(name):
+    if name not in _bundled:
+        try:
+            with open(os.path.join(BUNDLED_DIR, name)) as f:
+                _bundled[name] = json.load(f)
+        except (OSError, ValueError):
+            _bundled[name] = None
+    return _bundled[name]
+
+
+_default_cache = LottieCache()
+
+
+def load_lottie(url, bundled=None):
+    return _default_cache.get(url, bundled)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch Lottie animations into the disk cache.")
+    parser.add_argument('urls', nargs='+')
+    args = parser.parse_args(argv)
+
+    for url in args.urls:
+        thread = _default_cache.refresh_async(url)
+        if thread:
+            thread.join()
+        entry = _default_cache._read_disk(url)
+        if entry is None:
+            print(f"{url}: not cached (offline?)")
+        else:
+            age = time.time() - entry[1]['fetched']
+            print(f"{url}: cached, etag {entry[1].get('etag')}, refreshed {age:.0f}s ago")
+
+
+if __name__ == "__main__":
+    main()
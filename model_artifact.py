@@ -0,0 +1,156 @@
+"""Memory-mappable model artifact (.aqsf) for the water-potability forest.
+
+Layout (all little-endian):
+
+    b'AQSF' | uint32 format version | uint64 header length | JSON header
+    | node arrays, each starting on a 64-byte boundary
+
+The JSON header records the feature signature, classes, tree/node counts, a
+content hash and the offset / dtype / shape of every FlatForest array.
+load_artifact() maps the file read-only, so replicas on one host share the
+same physical pages and nothing is unpickled (no sklearn import needed).
+
+    python model_artifact.py export water_model.pkl            # -> water_model.aqsf
+    python model_artifact.py info water_model.aqsf
+"""
+import argparse
+import json
+import os
+import struct
+import time
+
+import numpy as np
+
+from forest_engine import FlatForest
+
+MAGIC = b'AQSF'
+FORMAT_VERSION = 1
+ALIGN = 64
+_PREAMBLE = struct.Struct('<4sIQ')
+
+# Input signature every artifact is checked against at load time
+FEATURE_SIGNATURE = {'features': ['ph', 'Solids', 'Turbidity'], 'dtype': 'float32'}
+
+
+def _aligned(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _le(array):
+    # Fixed little-endian dtypes so the file maps identically on every host
+    return np.ascontiguousarray(array, dtype=array.dtype.newbyteorder('<'))
+
+
+def export_artifact(forest, path, source=None):
+    arrays = {name: _le(getattr(forest, name)) for name in FlatForest.ARRAYS}
+
+    header = {
+        'format_version': FORMAT_VERSION,
+        'signature': FEATURE_SIGNATURE,
+        'classes': forest.classes_.tolist(),
+        'n_trees': forest.n_trees,
+        'n_nodes': forest.n_nodes,
+        'max_depth': forest.max_depth,
+        'content_hash': forest.content_hash(),
+        'source': source or {},
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'arrays': {},
+    }
+
+    # Offsets depend on the header size, so lay the arrays out against a
+    # generous header estimate and pad the real header up to it.
+    header_room = _aligned(_PREAMBLE.size + len(json.dumps(header)) + 160 * len(arrays)) - _PREAMBLE.size
+    offset = _PREAMBLE.size + header_room
+    for name in FlatForest.ARRAYS:
+        a = arrays[name]
+        header['arrays'][name] = {'offset': offset, 'dtype': a.dtype.str, 'shape': list(a.shape)}
+        offset = _aligned(offset + a.nbytes)
+    header_bytes = json.dumps(header).encode('utf-8')
+    if len(header_bytes) > header_room:
+        raise ValueError("Artifact header outgrew its reserved space")
+    header_bytes = header_bytes.ljust(header_room, b' ')
+
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for name in FlatForest.ARRAYS:
+            f.seek(header['arrays'][name]['offset'])
+            f.write(arrays[name].tobytes())
+        f.truncate(offset)
+    # Atomic replace: processes that already mapped the old file keep its pages
+    os.replace(tmp, path)
+    return header
+
+
+def read_header(path):
+    with open(path, 'rb') as f:
+        magic, version, header_len = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an AquaSight model artifact")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path} uses artifact format v{version}; this build reads v{FORMAT_VERSION}")
+        return json.loads(f.read(header_len))
+
+
+def load_artifact(path):
+    header = read_header(path)
+    if header['signature'] != FEATURE_SIGNATURE:
+        raise ValueError(f"{path} expects inputs {header['signature']}, not {FEATURE_SIGNATURE}")
+
+    mapped = np.memmap(path, dtype=np.uint8, mode='r')
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        start = spec['offset']
+        arrays[name] = mapped[start:start + count * dtype.itemsize].view(dtype).reshape(spec['shape'])
+
+    forest = FlatForest(classes=header['classes'], max_depth=header['max_depth'], **arrays)
+    forest.artifact_header = header
+    return forest
+
+
+def artifact_path_for(model_path):
+    return os.path.splitext(model_path)[0] + '.aqsf'
+
+
+def main(argv=None):
+    from predictor import DEFAULT_MODEL, load_model
+
+    parser = argparse.ArgumentParser(description="Export or inspect memory-mappable model artifacts.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    exp = sub.add_parser('export', help="Convert a pickled forest into an .aqsf artifact")
+    exp.add_argument('model', nargs='?', default=DEFAULT_MODEL)
+    exp.add_argument('output', nargs='?', help="Defaults to the model path with an .aqsf extension")
+    info = sub.add_parser('info', help="Print an artifact header and its cold-load time")
+    info.add_argument('artifact')
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        import sklearn
+
+        out = args.output or artifact_path_for(args.model)
+        t0 = time.perf_counter()
+        model = load_model(args.model)
+        unpickle_ms = (time.perf_counter() - t0) * 1e3
+        header = export_artifact(FlatForest.from_sklearn(model), out,
+                                 source={'pickle': os.path.basename(args.model), 'sklearn': sklearn.__version__})
+        t0 = time.perf_counter()
+        load_artifact(out)
+        map_ms = (time.perf_counter() - t0) * 1e3
+        print(f"Wrote {out}: {header['n_trees']} trees, {header['n_nodes']:,} nodes, "
+              f"{os.path.getsize(out) / 1e6:.1f} MB")
+        print(f"Load time: pickle {unpickle_ms:.1f} ms, mapped artifact {map_ms:.2f} ms")
+    else:
+        t0 = time.perf_counter()
+        forest = load_artifact(args.artifact)
+        map_ms = (time.perf_counter() - t0) * 1e3
+        header = dict(forest.artifact_header)
+        header.pop('arrays')
+        print(json.dumps(header, indent=2))
+        print(f"Mapped in {map_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
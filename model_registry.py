@@ -0,0 +1,288 @@
+"""Versioned model registry with hot reload.
+
+models/ holds one memory-mappable artifact per model version, named after
+the forest's content hash (<version>.aqsf, plus the pickle it came from for
+big batches and the probability grid when one was built for that exact
+model), and a CURRENT file naming the active version.  Publishing writes the artifact first and then replaces CURRENT
+with one rename, so readers see the old version or the new one, never a
+half-written model.
+
+HotPredictor follows CURRENT from a background thread.  A new version is
+loaded, given its own prediction cache pre-filled with the keys the old one
+was serving, and warmed by scoring a sample batch, all off the request path;
+then a single reference assignment makes it active.  Calls already running
+finish on the predictor they started with, and every Prediction carries the
+version that produced it, so history rows name the model that answered.
+
+    python model_registry.py publish water_model.pkl     # export + activate
+    python model_registry.py list
+    python model_registry.py activate 680916c86adb       # roll back or forward
+    python model_registry.py bench                       # latency across a swap
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+
+from forest_engine import FlatForest, sample_inputs
+from model_artifact import export_artifact, read_header
+from prediction_cache import PredictionCache
+from predictor import BASE_DIR, FLAT_MAX_ROWS, WaterPredictor, load_model
+from prob_grid import grid_paths
+
+REGISTRY_DIR = os.path.join(BASE_DIR, 'models')
+CURRENT = 'CURRENT'
+POLL_INTERVAL = 2.0
+
+
+class ModelRegistry:
+    def __init__(self, root=REGISTRY_DIR):
+        self.root = root
+
+    def path(self, version):
+        return os.path.join(self.root, version + '.aqsf')
+
+    def current(self):
+        try:
+            with open(os.path.join(self.root, CURRENT)) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def versions(self):
+        """[(version, artifact header)], oldest first."""
+        paths = sorted(glob.glob(os.path.join(self.root, '*.aqsf')), key=os.path.getmtime)
+        return [(os.path.basename(path)[:-len('.aqsf')], read_header(path)) for path in paths]
+
+    def publish(self, model_path, activate=True):
+        """Add the model at model_path (.pkl or .aqsf) as a version; returns its name."""
+        model = load_model(model_path)
+        forest = model if isinstance(model, FlatForest) else FlatForest.from_sklearn(model)
+        version = forest.content_hash()[:12]  # the same id WaterPredictor.version reports
+        os.makedirs(self.root, exist_ok=True)
+        if not os.path.exists(self.path(version)):
+            export_artifact(forest, self.path(version), source={'model': os.path.basename(model_path)})
+        if model_path.endswith('.pkl'):
+            self._copy(model_path, os.path.splitext(self.path(version))[0] + '.pkl')
+        self._copy_grid(model_path, version)
+        if activate:
+            self.activate(version)
+        return version
+
+    def _copy_grid(self, model_path, version):
+        table, meta = grid_paths(model_path)
+        try:
+            with open(meta) as f:
+                if json.load(f).get('model_version') != version:
+                    return
+        except (OSError, ValueError):
+            return
+        # Table first: a grid counts as present once its metadata exists
+        for src, dst in zip((table, meta), grid_paths(self.path(version))):
+            self._copy(src, dst)
+
+    @staticmethod
+    def _copy(src, dst):
+        if not os.path.exists(dst):
+            shutil.copyfile(src, dst + '.tmp')
+            os.replace(dst + '.tmp', dst)
+
+    def activate(self, version):
+        if not os.path.exists(self.path(version)):
+            raise ValueError(f"No model version {version} in {self.root}")
+        tmp = os.path.join(self.root, CURRENT + '.tmp')
+        with open(tmp, 'w') as f:
+            f.write(version + '\n')
+        os.replace(tmp, os.path.join(self.root, CURRENT))
+
+    def load(self, version):
+        return WaterPredictor.from_path(self.path(version))
+
+
+def warm(predictor, previous=None):
+    """Fault in the model's pages and fill its cache before it takes traffic."""
+    # Single-row-sized batches: a bigger one would load the bulk pickle, which most callers never need
+    X = sample_inputs(4096)
+    for start in range(0, len(X), FLAT_MAX_ROWS):
+        predictor.predict_batch(X[start:start + FLAT_MAX_ROWS])
+    if predictor.grid is not None:
+        np.asarray(predictor.grid.table).max()  # reads every page of the mapped table
+    if predictor.cache is not None and previous is not None and previous.cache is not None:
+        for point in previous.cache.points():
+            predictor.predict_one(*point)
+
+
+class HotPredictor:
+    """Predictor that follows the registry's CURRENT version without a restart.
+
+    Attribute access goes to the active WaterPredictor; call active() to pin
+    one predictor for a prediction and everything recorded about it.
+    configure(predictor) runs on every newly loaded predictor before warm-up
+    (e.g. to attach a cache or a coalescer).
+    """
+
+    def __init__(self, registry=None, fallback=None, configure=None, poll_interval=POLL_INTERVAL):
+        self.registry = registry or ModelRegistry()
+        self.configure = configure
+        self.poll_interval = poll_interval
+        self.swaps = 0
+        self.last_swap_ms = None
+        self.last_error = None
+        self._seen = self.registry.current()
+        if self._seen is not None:
+            self._active = self._prepare(self.registry.load(self._seen))
+        elif fallback is not None:
+            # Nothing published yet: start on the fallback, switch once something is
+            self._active = self._prepare(fallback())
+        else:
+            raise FileNotFoundError(f"No active model version in {self.registry.root}")
+        self._thread = threading.Thread(target=self._watch, name='model-watcher', daemon=True)
+        self._thread.start()
+
+    def active(self):
+        return self._active
+
+    def __getattr__(self, name):
+        if name == '_active':
+            raise AttributeError(name)
+        return getattr(self._active, name)
+
+    def _prepare(self, predictor, previous=None):
+        if self.configure is not None:
+            self.configure(predictor)
+        warm(predictor, previous)
+        return predictor
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            version = self.registry.current()
+            if version is None or version == self._seen:
+                continue
+            self._seen = version
+            t0 = time.perf_counter()
+            predictor = None
+            try:
+                predictor = self.registry.load(version)
+                self._prepare(predictor, self._active)
+            except Exception as e:
+                # Keep serving the current model; a later publish gets a new try
+                self.last_error = f"{version}: {e}"
+                if predictor is not None:
+                    predictor.close()
+                continue
+            previous, self._active = self._active, predictor  # the swap
+            self.swaps += 1
+            self.last_swap_ms = (time.perf_counter() - t0) * 1e3
+            # Calls already pinned to it still finish: a closed coalescer scores on the caller's thread
+            previous.close()
+
+    def stats(self):
+        return {'version': self._active.version, 'swaps': self.swaps,
+                'last_swap_ms': self.last_swap_ms, 'last_error': self.last_error}
+
+
+# --- BENCHMARK ---
+def _percentiles(latencies):
+    if not latencies:
+        return "no calls"
+    ms = np.array(latencies) * 1e3
+    return (f"{len(ms):>7,} calls  p50 {np.percentile(ms, 50):6.3f} ms  p99 {np.percentile(ms, 99):6.3f} ms  "
+            f"max {ms.max():6.2f} ms")
+
+
+def bench(seconds, threads):
+    import tempfile
+
+    from fallback_model import fallback_path, load_fallback_model
+    from predictor import DEFAULT_MODEL
+
+    registry = ModelRegistry(tempfile.mkdtemp())
+    old = registry.publish(DEFAULT_MODEL)
+    load_fallback_model()
+    new = registry.publish(fallback_path(), activate=False)
+
+    def configure(predictor):
+        predictor.cache = PredictionCache(maxsize=4096)
+
+    hot = HotPredictor(registry, configure=configure, poll_interval=0.05)
+    rng = np.random.default_rng(0)
+    # Dashboard-like traffic: a few hundred distinct widget readings
+    points = np.column_stack([np.round(rng.uniform(5, 9, 500), 1), np.round(rng.uniform(0, 40000, 500), -2),
+                              np.round(rng.uniform(0, 10, 500), 1)]).tolist()
+    calls = []
+    stop = threading.Event()
+
+    def worker(seed):
+        order = np.random.default_rng(seed).integers(0, len(points), 1_000_000)
+        i = 0
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            result = hot.active().predict_one(*points[order[i % len(order)]])
+            calls.append((t0, time.perf_counter() - t0, result.version))
+            i += 1
+            time.sleep(0.001)  # paced like real traffic rather than a CPU-bound loop
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    time.sleep(seconds / 2)
+    swap_at = time.perf_counter()
+    registry.activate(new)
+    time.sleep(seconds / 2)
+    stop.set()
+    for w in workers:
+        w.join()
+
+    if not hot.swaps:
+        raise SystemExit(f"no swap within {seconds / 2:g}s: {hot.stats()}")
+    print(f"{threads} threads, swap {old} -> {new} after {swap_at - start:.1f}s "
+          f"(load + warm {hot.last_swap_ms:.0f} ms in the watcher thread)")
+    print(f"before swap:      {_percentiles([d for t, d, v in calls if t < swap_at])}")
+    print(f"swap + 1 s:       {_percentiles([d for t, d, v in calls if swap_at <= t < swap_at + 1])}")
+    print(f"after:            {_percentiles([d for t, d, v in calls if t >= swap_at + 1])}")
+    first_new = min(t for t, d, v in calls if v == new)
+    stale = sum(1 for t, d, v in calls if v == old and t > first_new)
+    print(f"versions answered: {sorted({v for _, _, v in calls})}; old version after the first new answer: {stale}")
+    shutil.rmtree(registry.root)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the versioned model registry.")
+    parser.add_argument('--root', default=REGISTRY_DIR)
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('publish', help="Add a model version and make it current")
+    p.add_argument('model')
+    p.add_argument('--no-activate', action='store_true')
+    sub.add_parser('list')
+    a = sub.add_parser('activate', help="Make an existing version current")
+    a.add_argument('version')
+    b = sub.add_parser('bench', help="Prediction latency while a new version is swapped in")
+    b.add_argument('--seconds', type=float, default=6)
+    b.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry(args.root)
+    if args.command == 'publish':
+        version = registry.publish(args.model, activate=not args.no_activate)
+        print(f"published {version}" + ("" if args.no_activate else " (current)"))
+    elif args.command == 'activate':
+        registry.activate(args.version)
+        print(f"current: {args.version}")
+    elif args.command == 'list':
+        current = registry.current()
+        for version, header in registry.versions():
+            print(f"{'*' if version == current else ' '} {version}  {header['created']}  "
+                  f"{header['n_trees']} trees  {header['n_nodes']:,} nodes  {header.get('source') or ''}")
+    else:
+        bench(args.seconds, args.threads)
+
+
+if __name__ == "__main__":
+    main()
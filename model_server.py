@@ -0,0 +1,292 @@
+"""Host-wide model server for several Streamlit replicas.
+
+Replicas behind a proxy each used to load and hold their own copy of the
+forest (and app4.py its own fallback forest).  This daemon loads the model
+once per host and answers batched predictions over a Unix socket; replicas
+score through RemoteModel, a model proxy that WaterPredictor wraps like any
+other model, so caching, coalescing and the apps' code paths stay the same.
+Single-row requests go through the server's prediction cache, grid and
+coalescer, so concurrent clicks in different replicas share one model call.
+The server follows the model registry (model_registry.py), so a published
+version reaches every replica without restarting anything.
+
+Wire format, both directions little-endian:
+
+    request:   uint32 n | n x 3 float64 (ph, solids, turbidity)
+    response:  uint32 length | uint8 k | k-byte model version | n api_server.BINARY_RESULT records
+    n = 0 asks for the model info instead: JSON {model_version, classes, potable_index}
+    error:     uint32 length | uint8 255 | UTF-8 message; the client raises it as ValueError
+
+    python model_server.py serve                              # one per host
+    python model_server.py memory --replicas 1,4,16           # footprint comparison
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+
+import numpy as np
+
+from api_server import BINARY_RESULT, encode_binary
+from coalescer import PredictionCoalescer
+from prediction_cache import PredictionCache
+from model_registry import HotPredictor
+from predictor import BASE_DIR, DEFAULT_MODEL, WaterPredictor
+
+DEFAULT_SOCKET = os.path.join(BASE_DIR, 'model_server.sock')
+HEADER = struct.Struct('<I')
+MAX_ROWS = 1_000_000
+ERROR_MARK = 0xFF  # in place of the version length; versions are far shorter
+
+
+# --- SERVER ---
+def _configure(predictor):
+    # Each version gets its own cache and coalescer, so answers never mix versions
+    predictor.cache = PredictionCache(maxsize=4096)
+    predictor.coalescer = PredictionCoalescer(predictor.predict_rows)
+
+
+def load_server_predictor(model_path=DEFAULT_MODEL, registry=None):
+    # No synthetic fallback: without a real model the server does not start,
+    # remote_predictor() finds no socket and each app reports its own error
+    return HotPredictor(registry, fallback=lambda: WaterPredictor.from_path(model_path), configure=_configure)
+
+
+def model_info(predictor):
+    return {'model_version': predictor.version, 'classes': predictor.classes.tolist(),
+            'potable_index': predictor.potable_index}
+
+
+def score(predictor, rows):
+    """Response payload for an (n, 3) array: answering version, then BINARY_RESULT records."""
+    predictor = predictor.active()
+    if len(rows) == 1:
+        result = predictor.predict_one(*rows[0].tolist())
+        version = result.version
+        records = encode_binary([result.label], [result.confidence], [result.proba[predictor.potable_index]])
+    else:
+        version = predictor.version
+        labels, confidence, proba = predictor.predict_batch(rows)
+        records = encode_binary(labels, confidence, proba[:, predictor.potable_index])
+    version = (version or '').encode('ascii')
+    return bytes([len(version)]) + version + records
+
+
+async def handle_client(reader, writer, predictor):
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            (n,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+            if n > MAX_ROWS:
+                break
+            if n == 0:
+                payload = json.dumps(model_info(predictor)).encode('utf-8')
+            else:
+                rows = np.frombuffer(await reader.readexactly(n * 24), dtype='<f8').reshape(n, 3)
+                # A request the model rejects gets an error frame; the connection stays open
+                try:
+                    payload = await loop.run_in_executor(None, score, predictor, rows)
+                except Exception as e:
+                    payload = bytes([ERROR_MARK]) + str(e).encode('utf-8')
+            writer.write(HEADER.pack(len(payload)) + payload)
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass  # replica went away
+    finally:
+        writer.close()
+
+
+async def serve(socket_path, predictor):
+    if os.path.exists(socket_path):
+        os.remove(socket_path)  # left behind by a server that did not shut down cleanly
+    server = await asyncio.start_unix_server(lambda r, w: handle_client(r, w, predictor), path=socket_path)
+    print(f"Serving model {predictor.version} on {socket_path}", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        os.remove(socket_path)
+
+
+# --- CLIENT ---
+class RemoteModel:
+    """Model proxy that scores on the model server; wrap it in WaterPredictor.
+
+    Has the two attributes WaterPredictor needs from a model (classes_ and
+    predict_proba) plus the server's model version.  Each thread keeps its
+    own connection, so Streamlit sessions never share a socket.  The server
+    may swap versions between calls; last_version is the one that answered
+    this thread's latest call.
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, timeout=5.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+        info = json.loads(self._request(HEADER.pack(0)))
+        self.classes_ = np.asarray(info['classes'])
+        self.version = info['model_version']
+        self.potable_index = info['potable_index']
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            conn.settimeout(self.timeout)
+            conn.connect(self.socket_path)
+            self._local.conn = conn
+        return conn
+
+    def _recv_exactly(self, conn, n):
+        buf = bytearray()
+        while len(buf) < n:
+            chunk = conn.recv(n - len(buf))
+            if not chunk:
+                raise ConnectionError("model server closed the connection")
+            buf.extend(chunk)
+        return bytes(buf)
+
+    def _request(self, message):
+        conn = self._connection()
+        try:
+            conn.sendall(message)
+            (length,) = HEADER.unpack(self._recv_exactly(conn, HEADER.size))
+            return self._recv_exactly(conn, length)
+        except OSError:
+            # Reconnect on the next call (e.g. after a server restart)
+            conn.close()
+            self._local.conn = None
+            raise
+
+    @property
+    def last_version(self):
+        return getattr(self._local, 'version', self.version)
+
+    def predict_proba(self, X):
+        X = np.ascontiguousarray(X, dtype='<f8').reshape(-1, 3)
+        payload = self._request(HEADER.pack(len(X)) + X.tobytes())
+        k = payload[0]
+        if k == ERROR_MARK:
+            raise ValueError(payload[1:].decode('utf-8'))
+        self._local.version = payload[1:1 + k].decode('ascii') or None
+        result = np.frombuffer(payload, dtype=BINARY_RESULT, offset=1 + k)
+        proba = np.empty((len(X), 2))
+        proba[:, self.potable_index] = result['p_potable']
+        proba[:, 1 - self.potable_index] = 1.0 - proba[:, self.potable_index]
+        return proba
+
+
+def remote_predictor(socket_path=DEFAULT_SOCKET):
+    """WaterPredictor backed by the model server, or None when none is running."""
+    if not os.path.exists(socket_path):
+        return None
+    try:
+        return WaterPredictor(RemoteModel(socket_path))
+    except OSError:
+        return None
+
+
+# --- MEMORY COMPARISON ---
+# Each replica does what a dashboard process does for the model, scores a
+# batch so the pages it needs are touched, then waits for stdin to close
+_REPLICA = """
+import sys
+import numpy as np
+from predictor import DEFAULT_MODEL, FLAT_MAX_ROWS, WaterPredictor, load_model
+from model_server import remote_predictor
+mode = sys.argv[1]
+if mode == 'pickle':
+    p = WaterPredictor(load_model(DEFAULT_MODEL))
+elif mode == 'mmap':
+    p = WaterPredictor.from_path(DEFAULT_MODEL)
+elif mode == 'server':
+    p = remote_predictor(sys.argv[2])
+if mode != 'none':
+    p.predict_batch(np.random.default_rng(0).random((FLAT_MAX_ROWS, 3)) * [14, 50000, 20])
+    p.predict_one(7.0, 20000, 4.0)
+print('ready', flush=True)
+sys.stdin.read()
+"""
+MODES = {
+    'none': "python + numpy + predictor module, no model (baseline)",
+    'pickle': "each replica unpickles water_model.pkl",
+    'mmap': "each replica maps water_model.aqsf + grid",
+    'server': "one model server, replicas use RemoteModel",
+}
+
+
+def pss_kb(pid):
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            if line.startswith('Pss:'):
+                return int(line.split()[1])
+    return 0
+
+
+def measure_memory(mode, replicas, socket_path):
+    procs = []
+    daemon = None
+    try:
+        if mode == 'server':
+            daemon = subprocess.Popen([sys.executable, __file__, 'serve', '--socket', socket_path],
+                                      cwd=BASE_DIR, stdout=subprocess.PIPE, text=True)
+            daemon.stdout.readline()  # "Serving model ..."
+        for _ in range(replicas):
+            procs.append(subprocess.Popen([sys.executable, '-c', _REPLICA, mode, socket_path], cwd=BASE_DIR,
+                                          stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True))
+        for proc in procs:
+            if proc.stdout.readline().strip() != 'ready':
+                raise RuntimeError(f"replica in mode {mode} failed to start")
+        pids = [proc.pid for proc in procs] + ([daemon.pid] if daemon else [])
+        # PSS splits shared pages between the processes mapping them, so the sum is the host total
+        return sum(pss_kb(pid) for pid in pids) / 1024
+    finally:
+        for proc in procs:
+            proc.stdin.close()
+            proc.wait()
+        if daemon:
+            daemon.terminate()
+            daemon.wait()
+
+
+def memory_report(counts):
+    socket_path = os.path.join(tempfile.mkdtemp(), 'model.sock')
+    totals = {mode: [measure_memory(mode, n, socket_path) for n in counts] for mode in MODES}
+    print("Host memory (sum of PSS, MiB) for N replicas; 'model' is the total minus the no-model baseline")
+    print(f"{'mode':<8}" + "".join(f"{f'N={n} total':>13}{'model':>8}" for n in counts))
+    for mode, description in MODES.items():
+        cells = "".join(f"{total:>13.1f}{total - base:>8.1f}" for total, base in zip(totals[mode], totals['none']))
+        print(f"{mode:<8}{cells}   {description}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the model to every replica on this host over a Unix socket.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    s = sub.add_parser('serve')
+    s.add_argument('--socket', default=DEFAULT_SOCKET)
+    s.add_argument('--model', default=DEFAULT_MODEL)
+    m = sub.add_parser('memory', help="Compare host memory for N replicas with and without the server")
+    m.add_argument('--replicas', default="1,4,16")
+    args = parser.parse_args(argv)
+
+    if args.command == 'memory':
+        memory_report([int(n) for n in args.replicas.split(',')])
+        return
+    try:
+        predictor = load_server_predictor(args.model)
+    except FileNotFoundError as e:
+        raise SystemExit(f"No model to serve: {e}")
+    try:
+        asyncio.run(serve(args.socket, predictor))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Process-wide LRU cache of predictions keyed on quantized sensor readings.
+
+Readings are snapped to a configurable quantum per feature (pH, TDS,
+turbidity) and the prediction is computed at the snapped point, so every
+reading that shares a key gets the same answer no matter which one arrived
+first.  The cache remembers which model version filled it and empties itself
+when a different version asks.
+"""
+import math
+import threading
+from collections import OrderedDict
+
+# Default quantum per feature: finer than any dashboard widget step, so
+# widget inputs are never moved; raise it to merge near-identical readings
+DEFAULT_QUANTUM = (0.01, 1.0, 0.01)
+
+
+class PredictionCache:
+    def __init__(self, maxsize=4096, quantum=DEFAULT_QUANTUM):
+        self.maxsize = maxsize
+        self.quantum = tuple(quantum)
+        self.model_version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, ph, solids, turbidity):
+        values = (ph, solids, turbidity)
+        if any(v is None or math.isnan(v) for v in values):
+            return None
+        return tuple(round(v / q) if q else v for v, q in zip(values, self.quantum))
+
+    def snap(self, key):
+        # Rounded so the snapped point matches the widget literal (7.1, not 7.1000000000000005)
+        return tuple(round(k * q, 10) if q else k for k, q in zip(key, self.quantum))
+
+    def get_or_compute(self, model_version, ph, solids, turbidity, compute):
+        key = self.key(ph, solids, turbidity)
+        if key is None:
+            return compute(ph, solids, turbidity)
+
+        with self._lock:
+            if model_version != self.model_version:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self.model_version = model_version
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # Computed outside the lock so one slow miss never blocks hits
+        result = compute(*self.snap(key))
+
+        with self._lock:
+            if model_version == self.model_version:
+                self._entries[key] = result
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return result
+
+    def points(self):
+        """Snapped readings of the cached entries, least recently used first."""
+        with self._lock:
+            keys = list(self._entries)
+        return [self.snap(key) for key in keys]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'quantum': list(self.quantum),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'model_version': self.model_version,
+            }
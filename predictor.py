@@ -0,0 +1,186 @@
+"""Shared prediction path for the dashboards and bulk callers.
+
+Every entry point scores through WaterPredictor, which runs one
+predict_proba pass and derives label and confidence from it instead of
+calling model.predict() and model.predict_proba() on the same rows.
+"""
+import os
+import pickle
+import threading
+import time
+import warnings
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from forest_engine import FlatForest
+from model_artifact import artifact_path_for, load_artifact
+from prob_grid import ProbabilityGrid
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MODEL = os.path.join(BASE_DIR, 'water_model.pkl')
+
+# Feature order used by every app: np.array([[ph, solids, turbidity]])
+FEATURES = ['ph', 'Solids', 'Turbidity']
+
+# Batches up to this size go through FlatForest; bigger ones are faster in
+# sklearn's compiled tree walk.  Both give identical probabilities.
+FLAT_MAX_ROWS = 256
+
+# version: the model version that produced it (see model_registry.HotPredictor)
+Prediction = namedtuple('Prediction', ['label', 'confidence', 'proba', 'version'], defaults=(None,))
+
+# Off-script-thread inference for the dashboards; shared by every session
+_inference_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='inference')
+
+
+def make_fallback_model():
+    """Small stand-in forest for when no trained model file is available."""
+    from fallback_model import load_fallback_model  # seeded, trained once per host and cached
+    return load_fallback_model()
+
+
+def resolve_model_path(path=DEFAULT_MODEL):
+    # Prefer the memory-mapped artifact next to the pickle unless the pickle is newer
+    artifact = artifact_path_for(path)
+    if path != artifact and os.path.exists(artifact):
+        if not os.path.exists(path) or os.path.getmtime(artifact) >= os.path.getmtime(path):
+            return artifact
+    return path
+
+
+def load_model(path=DEFAULT_MODEL):
+    if path.endswith('.aqsf'):
+        return load_artifact(path)
+    with open(path, 'rb') as f:
+        with warnings.catch_warnings():
+            # InconsistentVersionWarning is a UserWarning subclass
+            warnings.simplefilter("ignore", category=UserWarning)
+            return pickle.load(f)
+
+
+class WaterPredictor:
+    def __init__(self, model, grid=None, cache=None, bulk_path=None):
+        self.model = model
+        self.grid = grid
+        # Optional prediction_cache.PredictionCache in front of predict_one()
+        self.cache = cache
+        # Optional coalescer.PredictionCoalescer that merges concurrent live calls
+        self.coalescer = None
+        self.classes = np.asarray(model.classes_)
+        # Column of predict_proba holding P(potable); class 1 in the Colab model
+        hits = np.flatnonzero(self.classes == 1)
+        self.potable_index = int(hits[0]) if len(hits) else len(self.classes) - 1
+        if isinstance(model, FlatForest):
+            self.engine = model
+        else:
+            try:
+                self.engine = FlatForest.from_sklearn(model)
+            except (TypeError, AttributeError):
+                self.engine = None
+        # Identifies the forest itself, so the .pkl and its .aqsf export share a version
+        header = getattr(self.engine, 'artifact_header', None)
+        if header is not None:
+            self.version = header['content_hash'][:12]
+        elif self.engine is not None:
+            self.version = self.engine.content_hash()[:12]
+        else:
+            # e.g. model_server.RemoteModel, which reports the server's version
+            self.version = getattr(model, 'version', None)
+        # When model is a mapped FlatForest, the pickle it was exported from
+        # scores big batches; loaded on the first one, so single-row callers
+        # never pay for it
+        self.bulk_path = bulk_path
+        self._bulk = None
+        self._bulk_lock = threading.Lock()
+
+    def active(self):
+        # Same interface as model_registry.HotPredictor: the predictor to pin for a sequence of calls
+        return self
+
+    def close(self):
+        # Stops the coalescer's thread, which would otherwise keep this predictor alive
+        if self.coalescer is not None:
+            self.coalescer.close()
+
+    @classmethod
+    def from_path(cls, path=DEFAULT_MODEL, use_grid=True):
+        resolved = resolve_model_path(path)
+        pickle_path = os.path.splitext(resolved)[0] + '.pkl'
+        bulk_path = pickle_path if resolved.endswith('.aqsf') and os.path.exists(pickle_path) else None
+        predictor = cls(load_model(resolved), bulk_path=bulk_path)
+        if use_grid:
+            try:
+                grid = ProbabilityGrid.load(path)
+            except (OSError, ValueError):
+                grid = None
+            # A grid built from another model version is ignored, not trusted
+            if grid is not None and grid.meta.get('model_version') == predictor.version:
+                predictor.grid = grid
+        return predictor
+
+    def bulk_model(self):
+        """Model for batches above FLAT_MAX_ROWS, or None to stay on FlatForest."""
+        if self.engine is not self.model:
+            return self.model
+        if self.bulk_path is None:
+            return None
+        with self._bulk_lock:
+            if self._bulk is None:
+                try:
+                    model = load_model(self.bulk_path)
+                    # Only a pickle of this exact forest may answer for it
+                    same = FlatForest.from_sklearn(model).content_hash()[:12] == self.version
+                except (OSError, ImportError, TypeError, AttributeError, pickle.UnpicklingError):
+                    same = False
+                self._bulk = model if same else False
+        return self._bulk or None
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if self.engine is not None and len(X) <= FLAT_MAX_ROWS:
+            return self.engine.predict_proba(X)
+        bulk = self.bulk_model()
+        return (bulk if bulk is not None else self.model).predict_proba(X)
+
+    def predict_batch(self, X):
+        """Score an (n, 3) array; returns (labels, confidence, proba)."""
+        proba = self.predict_proba(X)
+        # argmax picks the first class on ties, exactly like model.predict()
+        best = proba.argmax(axis=1)
+        labels = self.classes[best]
+        confidence = proba[np.arange(len(best)), best]
+        return labels, confidence, proba
+
+    def predict_rows(self, X):
+        labels, confidence, proba = self.predict_batch(X)
+        # A RemoteModel reports the version that answered this thread's last call
+        version = getattr(self.model, 'last_version', self.version)
+        return [Prediction(label, conf, row, version)
+                for label, conf, row in zip(labels.tolist(), confidence.tolist(), proba)]
+
+    def predict_one(self, ph, solids, turbidity):
+        if self.cache is not None:
+            return self.cache.get_or_compute(self.version, ph, solids, turbidity, self._predict_one)
+        return self._predict_one(ph, solids, turbidity)
+
+    def submit(self, ph, solids, turbidity):
+        # Future of (Prediction, seconds spent in inference)
+        return _inference_pool.submit(self._timed_predict_one, ph, solids, turbidity)
+
+    def _timed_predict_one(self, ph, solids, turbidity):
+        t0 = time.perf_counter()
+        result = self.predict_one(ph, solids, turbidity)
+        return result, time.perf_counter() - t0
+
+    def _predict_one(self, ph, solids, turbidity):
+        if self.grid is not None:
+            proba = self.grid.lookup(ph, solids, turbidity)
+            if proba is not None:
+                # The same floats the forest returns, so argmax settles the label (and ties) as live does
+                best = int(proba.argmax())
+                return Prediction(self.classes[best].item(), float(proba[best]), proba, self.version)
+        if self.coalescer is not None:
+            return self.coalescer.predict([ph, solids, turbidity])
+        return self.predict_rows([[ph, solids, turbidity]])[0]
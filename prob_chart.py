@@ -0,0 +1,139 @@
+"""Potable / not-potable probability chart for the dashboards.
+
+The chart is a small inline SVG pie built from string templates, so a
+prediction costs no figure, no rasterization and no image upload; the browser
+draws it.  Probabilities are rounded to the 0.1% shown in the labels and each
+distinct chart is memoized, so repeated results are a dictionary hit.
+matplotlib is imported only when the legacy raster chart is asked for.
+
+    python prob_chart.py --bench      # SVG vs matplotlib per-prediction cost
+"""
+import argparse
+import functools
+import math
+import time
+
+LABELS = ('Not Potable', 'Potable')
+COLORS = ('#ff4d4d', '#00ff88')
+SIZE = 320
+RADIUS = 100
+EXPLODE = 0.1  # fraction of the radius the predicted slice is pulled out
+
+_SVG = ('<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {size} {size}" '
+        'style="width:100%;max-width:{size}px;height:auto;display:block;margin:auto" role="img" '
+        'aria-label="{aria}"><defs><filter id="pie-shadow" x="-20%" y="-20%" width="140%" height="140%">'
+        '<feDropShadow dx="4" dy="4" stdDeviation="3" flood-opacity="0.45"/></filter></defs>'
+        '<g filter="url(#pie-shadow)">{slices}</g>{text}</svg>')
+_TEXT = ('<text x="{x:.1f}" y="{y:.1f}" fill="white" font-size="{size}" font-weight="bold" '
+         'font-family="sans-serif" text-anchor="middle" dominant-baseline="middle">{label}</text>')
+
+
+def _point(cx, cy, r, angle):
+    # Angles in degrees, counter-clockwise from 12 o'clock (matplotlib's startangle=90)
+    rad = math.radians(angle + 90)
+    return cx + r * math.cos(rad), cy - r * math.sin(rad)
+
+
+@functools.lru_cache(maxsize=2048)
+def _pie(permille_safe, highlight):
+    shares = ((1000 - permille_safe) / 1000, permille_safe / 1000)
+    c = SIZE / 2
+    slices, text = [], []
+    start = 0.0
+    for i, share in enumerate(shares):
+        sweep = share * 360
+        mid = start + sweep / 2
+        cx, cy = _point(c, c, RADIUS * EXPLODE, mid) if i == highlight else (c, c)
+        if share >= 1:
+            slices.append(f'<circle cx="{cx:.1f}" cy="{cy:.1f}" r="{RADIUS}" fill="{COLORS[i]}"/>')
+        elif share > 0:
+            x0, y0 = _point(cx, cy, RADIUS, start)
+            x1, y1 = _point(cx, cy, RADIUS, start + sweep)
+            slices.append(f'<path d="M{cx:.1f},{cy:.1f} L{x0:.1f},{y0:.1f} '
+                          f'A{RADIUS},{RADIUS} 0 {int(sweep > 180)},0 {x1:.1f},{y1:.1f} Z" fill="{COLORS[i]}"/>')
+        if share > 0:
+            lx, ly = _point(cx, cy, RADIUS * 1.25, mid)
+            px, py = _point(cx, cy, RADIUS * 0.6, mid)
+            text.append(_TEXT.format(x=lx, y=ly, size=14, label=LABELS[i]))
+            text.append(_TEXT.format(x=px, y=py, size=13, label=f"{share * 100:.1f}%"))
+        start += sweep
+    aria = f"{LABELS[1]} {shares[1] * 100:.1f}%, {LABELS[0]} {shares[0] * 100:.1f}%"
+    return _SVG.format(size=SIZE, aria=aria, slices="".join(slices), text="".join(text))
+
+
+def pie_svg(proba, highlight):
+    """SVG markup for st.markdown(..., unsafe_allow_html=True).
+
+    proba is (P(not potable), P(potable)); highlight is the predicted class,
+    whose slice is pulled out.
+    """
+    return _pie(int(round(float(proba[1]) * 1000)), int(highlight))
+
+
+def legacy_pie(proba, highlight):
+    """The original matplotlib figure, for callers that need a raster image.
+
+    The caller closes it with matplotlib.pyplot.close(fig).
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    explode = [EXPLODE if i == highlight else 0 for i in range(2)]
+    fig, ax = plt.subplots(figsize=(5, 5))
+    fig.patch.set_facecolor('none')
+    ax.pie(proba, explode=explode, labels=LABELS, colors=COLORS, autopct='%1.1f%%',
+           shadow=True, startangle=90, textprops={'color': "white", 'fontsize': 12, 'weight': 'bold'})
+    ax.axis('equal')
+    return fig
+
+
+# --- BENCHMARK ---
+def _per_call_ms(fn, args_list):
+    t0 = time.perf_counter()
+    for args in args_list:
+        fn(*args)
+    return (time.perf_counter() - t0) / len(args_list) * 1e3
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the probability chart renderers.")
+    parser.add_argument('--bench', action='store_true')
+    parser.add_argument('-n', type=int, default=2000, help="predictions to render")
+    args = parser.parse_args(argv)
+    if not args.bench:
+        parser.print_help()
+        return
+
+    import random
+    rng = random.Random(0)
+    # Forest probabilities are vote fractions, so results repeat a lot
+    cases = []
+    for _ in range(args.n):
+        p = rng.randrange(101) / 100
+        cases.append(((1 - p, p), int(p >= 0.5)))
+
+    t0 = time.perf_counter()
+    import matplotlib.pyplot as plt
+    import_ms = (time.perf_counter() - t0) * 1e3
+
+    def raster(proba, highlight):
+        # What st.pyplot does: render the figure to PNG
+        import io
+        fig = legacy_pie(proba, highlight)
+        fig.savefig(io.BytesIO(), format='png', bbox_inches='tight')
+        plt.close(fig)
+
+    mpl_ms = _per_call_ms(raster, cases[:50])
+    _pie.cache_clear()
+    cold_ms = _per_call_ms(lambda proba, h: _pie.__wrapped__(int(round(proba[1] * 1000)), h), cases)
+    warm_ms = _per_call_ms(pie_svg, cases)
+    print(f"matplotlib import:        {import_ms:8.1f} ms (once, now only on the legacy path)")
+    print(f"matplotlib pie + PNG:     {mpl_ms:8.2f} ms per prediction")
+    print(f"SVG pie, uncached:        {cold_ms:8.3f} ms per prediction")
+    print(f"SVG pie, memoized:        {warm_ms:8.4f} ms per prediction ({_pie.cache_info().currsize} distinct charts)")
+    print(f"SVG size:                 {len(pie_svg(*cases[0])):8,} B")
+
+
+if __name__ == "__main__":
+    main()
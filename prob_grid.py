@@ -0,0 +1,196 @@
+"""Precomputed P(potable) lookup grid for the bounded dashboard inputs.
+
+The dashboard inputs are quantized (pH 0-14 in 0.1 steps, TDS 0-50000 ppm in
+100 ppm steps, turbidity 0-20 NTU in 0.1 steps), so the forest can be scored
+once over that lattice.  Each cell stores how many trees vote potable
+(uint8, or uint16 past 255 trees), and a lookup divides by the number of
+trees exactly as the forest does, so a grid answer is the same float the
+live path returns.  That only holds for forests whose leaves are pure, where
+every probability is a vote fraction; for others the build refuses.  The
+table is saved next to the model as water_model.grid.npy plus a small JSON
+sidecar, and answered with an O(1) lookup.  Only readings that sit on the
+lattice are answered; anything between lattice points or outside the grid
+returns None so the caller falls back to live inference.
+
+    python prob_grid.py build     # ~14M cells, one pass over the forest
+    python prob_grid.py check                     # agreement with live inference
+"""
+import argparse
+import json
+import math
+import os
+import time
+
+import numpy as np
+
+# (name, low, high, step) in model feature order
+AXES = (
+    ('ph', 0.0, 14.0, 0.1),
+    ('Solids', 0.0, 50000.0, 100.0),
+    ('Turbidity', 0.0, 20.0, 0.1),
+)
+
+# How far (in steps) a reading may sit from a lattice point and still count
+# as on it: absorbs float noise like 7.1 / 0.1 = 70.99999999999999
+LATTICE_EPS = 1e-6
+
+
+def grid_paths(model_path):
+    stem = os.path.splitext(model_path)[0]
+    return stem + '.grid.npy', stem + '.grid.json'
+
+
+def axis_values(low, high, step):
+    n = int(round((high - low) / step)) + 1
+    # Round so lattice points equal the literals the widgets produce (0.3, not 0.30000000000000004)
+    return np.round(low + np.arange(n) * step, 10)
+
+
+class ProbabilityGrid:
+    def __init__(self, table, meta):
+        self.table = table
+        self.meta = meta
+        self.axes = [(a['low'], a['step'], a['size']) for a in meta['axes']]
+        self.classes = np.asarray(meta['classes'])
+        self.potable_index = meta['potable_index']
+        if meta.get('encoding') != 'votes':
+            # float16 / scaled uint8 tables gave answers that differed from live inference
+            raise ValueError("Grid does not store tree votes; rebuild it with: python prob_grid.py build")
+        self.n_trees = meta['n_trees']
+
+    @classmethod
+    def load(cls, model_path):
+        table_path, meta_path = grid_paths(model_path)
+        with open(meta_path) as f:
+            meta = json.load(f)
+        return cls(np.load(table_path, mmap_mode='r'), meta)
+
+    def cell(self, ph, solids, turbidity):
+        index = []
+        for value, (low, step, size) in zip((ph, solids, turbidity), self.axes):
+            if value is None or math.isnan(value):
+                return None
+            position = (value - low) / step
+            i = round(position)
+            if abs(position - i) > LATTICE_EPS or i < 0 or i >= size:
+                return None
+            index.append(i)
+        return tuple(index)
+
+    def lookup(self, ph, solids, turbidity):
+        """Class probabilities at the reading's lattice point, or None when it is not on one."""
+        index = self.cell(ph, solids, turbidity)
+        if index is None:
+            return None
+        return self.proba_row(int(self.table[index]))
+
+    def proba_row(self, votes):
+        # Votes over the tree count, per class: the same division the forest makes
+        proba = np.empty(2)
+        proba[self.potable_index] = votes / self.n_trees
+        proba[1 - self.potable_index] = (self.n_trees - votes) / self.n_trees
+        return proba
+
+
+def build_grid(predictor, model_path, report=print):
+    if len(predictor.classes) != 2:
+        raise ValueError("The probability grid only supports two-class models")
+    n_trees = getattr(predictor.engine, 'n_trees', None)
+    if n_trees is None:
+        raise ValueError("The probability grid needs a local forest")
+
+    axes = [axis_values(low, high, step) for _, low, high, step in AXES]
+    shape = tuple(len(a) for a in axes)
+    table = np.empty(shape, dtype=np.uint8 if n_trees <= 255 else np.uint16)
+
+    # One pH slice at a time keeps the feature block around 100k rows
+    solids, turbidity = np.meshgrid(axes[1], axes[2], indexing='ij')
+    block = np.column_stack([np.zeros(solids.size), solids.ravel(), turbidity.ravel()])
+    start = time.perf_counter()
+    for i, ph in enumerate(axes[0]):
+        block[:, 0] = ph
+        proba = predictor.predict_proba(block)
+        votes = np.round(proba[:, predictor.potable_index] * n_trees)
+        exact = (np.array_equal(votes / n_trees, proba[:, predictor.potable_index])
+                 and np.array_equal((n_trees - votes) / n_trees, proba[:, 1 - predictor.potable_index]))
+        if not exact:
+            raise ValueError("The forest's probabilities are not whole tree votes (impure leaves), "
+                             "so a grid could not reproduce live answers")
+        table[i] = votes.reshape(shape[1:])
+        if report and (i % 20 == 0 or i == shape[0] - 1):
+            report(f"  pH {ph:4.1f}: {(i + 1) * block.shape[0]:>12,} cells  {time.perf_counter() - start:7.1f}s")
+
+    meta = {
+        'axes': [{'name': name, 'low': low, 'step': step, 'size': len(values)}
+                 for (name, low, _, step), values in zip(AXES, axes)],
+        'encoding': 'votes',
+        'n_trees': n_trees,
+        'dtype': table.dtype.name,
+        'classes': predictor.classes.tolist(),
+        'potable_index': predictor.potable_index,
+        'model_version': predictor.version,
+    }
+    table_path, meta_path = grid_paths(model_path)
+    np.save(table_path, table)
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f, indent=2)
+    return ProbabilityGrid(table, meta)
+
+
+def check_grid(grid, predictor, n=20_000, seed=0):
+    """Compare what a predictor answers (grid, else live) with live inference.
+
+    Run on lattice points, where the grid answers, and on arbitrary in-range
+    points, which should all fall through to live inference.
+    """
+    rng = np.random.default_rng(seed)
+    results = {}
+    lattice = np.column_stack([rng.integers(0, size, n) * step + low for low, step, size in grid.axes])
+    lattice = np.round(lattice, 10)
+    anywhere = np.column_stack([rng.uniform(low, high, n) for _, low, high, _ in AXES])
+    for name, X in (('lattice points', lattice), ('off-lattice points', anywhere)):
+        live = predictor.predict_proba(X)[:, grid.potable_index]
+        cached = np.array([np.nan if row is None else row[grid.potable_index]
+                           for row in (grid.lookup(*x) for x in X)])
+        hits = ~np.isnan(cached)
+        cached = np.where(hits, cached, live)
+        live_label = live > 0.5
+        results[name] = {
+            'grid_hits': float(hits.mean()),
+            'label_agreement': float(np.mean((cached > 0.5) == live_label)),
+            'identical': float(np.mean(cached == live)),
+            'max_abs_error': float(np.abs(cached - live).max()),
+            'mean_abs_error': float(np.abs(cached - live).mean()),
+        }
+    return results
+
+
+def main(argv=None):
+    from predictor import DEFAULT_MODEL, WaterPredictor, load_model
+
+    parser = argparse.ArgumentParser(description="Build or check the precomputed probability grid.")
+    parser.add_argument('command', choices=['build', 'check'])
+    parser.add_argument('--model', default=DEFAULT_MODEL, help="Path to water_model.pkl")
+    args = parser.parse_args(argv)
+
+    # Score from the pickle when there is one: sklearn's compiled walk is the
+    # fast path for 100k-row blocks (the .aqsf export has the same version)
+    if os.path.exists(args.model) and not args.model.endswith('.aqsf'):
+        predictor = WaterPredictor(load_model(args.model))
+    else:
+        predictor = WaterPredictor.from_path(args.model, use_grid=False)
+    if args.command == 'build':
+        start = time.perf_counter()
+        grid = build_grid(predictor, args.model)
+        print(f"Wrote {grid_paths(args.model)[0]}: {grid.table.shape} {grid.table.dtype}, "
+              f"{grid.table.nbytes / 1e6:.1f} MB in {time.perf_counter() - start:.1f}s")
+    else:
+        grid = ProbabilityGrid.load(args.model)
+    for name, stats in check_grid(grid, predictor).items():
+        print(f"{name:>20}: grid answered {stats['grid_hits']:.2%}, labels agree {stats['label_agreement']:.4%}, "
+              f"identical to live {stats['identical']:.4%}, "
+              f"max |dp| {stats['max_abs_error']:.4f}, mean |dp| {stats['mean_abs_error']:.5f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Page routing for the multi-page Streamlit apps.
+
+Pages register a render function with @router.page(name).  Navigation
+buttons use router.link(name) as their on_click callback, so the page
+switch is recorded before Streamlit's own rerun and there is no second
+st.rerun() pass.  Timed transitions (the splash screen) run in the browser as
+CSS animations; no page ever holds a script thread while it waits.
+"""
+import streamlit as st
+
+
+class Router:
+    def __init__(self, default, state_key='page'):
+        self.default = default
+        self.state_key = state_key
+        self.pages = {}
+
+    def page(self, name):
+        def register(render):
+            self.pages[name] = render
+            return render
+        return register
+
+    @property
+    def current(self):
+        return st.session_state.get(self.state_key, self.default)
+
+    def link(self, name):
+        # For on_click=: runs before the rerun the click already triggers
+        def navigate():
+            st.session_state[self.state_key] = name
+        return navigate
+
+    def go(self, name):
+        # For code paths outside a widget callback
+        st.session_state[self.state_key] = name
+        st.rerun()
+
+    def render(self):
+        if self.current not in self.pages:
+            st.session_state[self.state_key] = self.default
+        self.pages[self.current]()
+
+
+def splash_overlay(inner_html, style='', seconds=3.0, once_key='splash_shown'):
+    """Full-screen splash drawn over the first page and faded out by the browser.
+
+    Shown once per session; the page underneath renders immediately, so the
+    script run finishes in milliseconds instead of sleeping for the splash.
+    `style` is extra CSS for inner_html when the page stylesheet lacks it.
+    """
+    if st.session_state.get(once_key):
+        return
+    st.session_state[once_key] = True
+    # A blank line would end the HTML block in Streamlit's markdown parser
+    style = "\n".join(line for line in style.splitlines() if line.strip())
+    st.markdown(f"""
+    <style>
+    {style}
+    .splash-overlay {{
+        position: fixed;
+        inset: 0;
+        z-index: 999999;
+        background: linear-gradient(180deg, #001428, #001f4d);
+        animation: splash-out 0.6s ease-in {seconds}s forwards;
+    }}
+    @keyframes splash-out {{
+        0%   {{ opacity: 1; visibility: visible; }}
+        100% {{ opacity: 0; visibility: hidden; pointer-events: none; }}
+    }}
+    </style>
+    <div class="splash-overlay">{inner_html}</div>
+    """, unsafe_allow_html=True)
@@ -0,0 +1,315 @@
+"""ESP32 sensor ingestion service.
+
+An asyncio TCP server that accepts readings from many devices, buffers them
+into micro-batches and scores each batch with one model call.  The latest
+result per device is published to live_readings.json, which the dashboard
+reads, and every scored reading is appended to the shared history store.
+
+Each connection speaks one of two formats, chosen by its first byte:
+
+  * JSON lines:  {"device": "esp32-07", "ph": 7.1, "tds": 350, "turbidity": 1.2, "ts": 1739700000.0}
+  * binary:      25-byte records  <B I d f f f  (0xA5, device id, unix ts, pH, TDS, turbidity)
+
+    python sensor_ingest.py serve --port 9750
+    python sensor_ingest.py simulate --devices 50 --rate 5000 --seconds 10 [--binary]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from history_store import DEFAULT_DB, HistoryStore
+from model_registry import HotPredictor
+from predictor import BASE_DIR, DEFAULT_MODEL, WaterPredictor
+
+DEFAULT_PORT = 9750
+DEFAULT_LIVE_PATH = os.path.join(BASE_DIR, 'live_readings.json')
+
+BINARY_MAGIC = 0xA5
+BINARY_RECORD = struct.Struct('<BIdfff')
+# The forest compares features as float32; anything past this cannot be scored
+FEATURE_LIMIT = float(np.finfo(np.float32).max)
+
+# Accepted JSON spellings for each feature
+_PH_KEYS = ('ph', 'pH')
+_SOLIDS_KEYS = ('solids', 'tds', 'Solids', 'TDS')
+_TURBIDITY_KEYS = ('turbidity', 'Turbidity', 'ntu')
+
+
+def _number(value, limit=None):
+    # Every malformed value surfaces as ValueError, so one handler skips the reading
+    try:
+        number = float(value)
+    except (TypeError, OverflowError):
+        raise ValueError(f"Not a number: {value!r}") from None
+    if not np.isfinite(number) or (limit is not None and abs(number) > limit):
+        raise ValueError(f"Out of range: {value!r}")
+    return number
+
+
+def _first(record, keys):
+    for k in keys:
+        if k in record:
+            return _number(record[k], FEATURE_LIMIT)
+    raise KeyError(keys[0])
+
+
+def reading_features(record):
+    """(ph, solids, turbidity) from a decoded JSON reading."""
+    return _first(record, _PH_KEYS), _first(record, _SOLIDS_KEYS), _first(record, _TURBIDITY_KEYS)
+
+
+def parse_json_reading(line):
+    # Returns (device, ts, ph, solids, turbidity)
+    record = json.loads(line)
+    if not isinstance(record, dict):
+        raise ValueError("A reading must be a JSON object")
+    return (str(record.get('device', 'unknown')), _number(record.get('ts') or time.time())) + reading_features(record)
+
+
+def parse_binary_readings(buffer):
+    """Decode every complete record in buffer; returns (readings, bytes consumed).
+
+    Records with a NaN or infinite value are skipped.
+    """
+    usable = len(buffer) - len(buffer) % BINARY_RECORD.size
+    readings = []
+    now = time.time()
+    for magic, device, ts, ph, solids, turbidity in BINARY_RECORD.iter_unpack(buffer[:usable]):
+        if magic != BINARY_MAGIC:
+            raise ValueError("Lost binary record framing")
+        if np.isfinite((ts, ph, solids, turbidity)).all():
+            readings.append((str(device), ts or now, ph, solids, turbidity))
+    return readings, usable
+
+
+def encode_binary_reading(device, ts, ph, solids, turbidity):
+    return BINARY_RECORD.pack(BINARY_MAGIC, device, ts, ph, solids, turbidity)
+
+
+# --- 1. SHARED STORE ---
+class LiveStore:
+    """Latest scored reading per device, written atomically for the dashboard."""
+
+    def __init__(self, path=DEFAULT_LIVE_PATH, min_interval=0.5):
+        self.path = path
+        self.min_interval = min_interval
+        self.devices = {}
+        self.readings = 0
+        self.batches = 0
+        self.model_version = None
+        self._last_write = 0.0
+
+    def publish(self, batch, labels, confidence):
+        self.readings += len(batch)
+        self.batches += 1
+        for (device, ts, ph, solids, turbidity), label, conf in zip(batch, labels.tolist(), confidence.tolist()):
+            entry = self.devices.get(device)
+            count = entry['count'] + 1 if entry else 1
+            self.devices[device] = {'ts': ts, 'ph': ph, 'solids': solids, 'turbidity': turbidity,
+                                    'label': label, 'confidence': conf, 'count': count}
+        if time.monotonic() - self._last_write >= self.min_interval:
+            self.flush()
+
+    def flush(self):
+        snapshot = {'updated': time.time(), 'model_version': self.model_version,
+                    'readings': self.readings, 'batches': self.batches, 'devices': self.devices}
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp, self.path)
+        self._last_write = time.monotonic()
+
+
+def read_live(path=DEFAULT_LIVE_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# --- 2. MICRO-BATCHING ---
+class MicroBatcher:
+    def __init__(self, predictor, store, max_batch=512, max_delay=0.01, history=None):
+        self.predictor = predictor
+        self.store = store
+        self.history = history
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.pending = []
+        self.failed = 0
+        self._ready = asyncio.Event()
+        self._full = asyncio.Event()
+        # One scoring thread keeps the event loop free and the batches in arrival order
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ingest-score')
+
+    def add(self, readings):
+        self.pending.extend(readings)
+        self._ready.set()
+        if len(self.pending) >= self.max_batch:
+            self._full.set()
+
+    def score(self, batch):
+        X = np.array([r[2:] for r in batch], dtype=np.float64)
+        predictor = self.predictor.active()  # one version for the whole batch, even across a swap
+        labels, confidence, _ = predictor.predict_batch(X)
+        self.store.model_version = version = predictor.version
+        self.store.publish(batch, labels, confidence)
+        if self.history is not None:
+            self.history.append_many(
+                (ts, str(device), ph, solids, turbidity, label, conf, version)
+                for (device, ts, ph, solids, turbidity), label, conf in zip(batch, labels.tolist(), confidence.tolist()))
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._ready.wait()
+            # Wait for a full batch or the batching window, whichever comes first
+            try:
+                await asyncio.wait_for(self._full.wait(), self.max_delay)
+            except asyncio.TimeoutError:
+                pass
+            batch, self.pending = self.pending, []
+            self._ready.clear()
+            self._full.clear()
+            for start in range(0, len(batch), self.max_batch):
+                chunk = batch[start:start + self.max_batch]
+                # A batch that cannot be scored is dropped; the server keeps ingesting
+                try:
+                    await loop.run_in_executor(self._executor, self.score, chunk)
+                except Exception as e:
+                    self.failed += len(chunk)
+                    print(f"Dropped a batch of {len(chunk)} readings: {e}", flush=True)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+# --- 3. SERVER ---
+async def handle_device(reader, writer, batcher):
+    try:
+        first = await reader.read(1)
+        if not first:
+            return
+        if first[0] == BINARY_MAGIC:
+            buffer = first
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                buffer += data
+                readings, used = parse_binary_readings(buffer)
+                buffer = buffer[used:]
+                if readings:
+                    batcher.add(readings)
+        else:
+            line = first + await reader.readline()
+            while line:
+                if line.strip():
+                    try:
+                        batcher.add([parse_json_reading(line)])
+                    except (ValueError, KeyError):
+                        pass  # skip malformed readings, keep the connection
+                line = await reader.readline()
+    except (ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def report_throughput(store, every=5.0):
+    last = store.readings
+    while True:
+        await asyncio.sleep(every)
+        print(f"  {store.readings:>12,} readings  {(store.readings - last) / every:>10,.0f}/s  "
+              f"{len(store.devices)} devices  {store.batches:,} batches", flush=True)
+        last = store.readings
+
+
+async def serve(host, port, predictor, store, max_batch, max_delay, history=None):
+    batcher = MicroBatcher(predictor, store, max_batch, max_delay, history)
+    server = await asyncio.start_server(lambda r, w: handle_device(r, w, batcher), host, port)
+    print(f"Listening for sensor readings on {host}:{port} (model {predictor.version})", flush=True)
+    try:
+        async with server:
+            await asyncio.gather(server.serve_forever(), batcher.run(), report_throughput(store))
+    finally:
+        batcher.close()
+
+
+# --- 4. SIMULATOR ---
+async def simulate_device(host, port, device, rate, seconds, binary):
+    _, writer = await asyncio.open_connection(host, port)
+    sent = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        # Send in 10 ms slices to hold the requested rate
+        due = int((time.perf_counter() - start) * rate) - sent
+        for _ in range(max(due, 0)):
+            ph, solids, turbidity = random.uniform(5, 9), random.uniform(100, 50000), random.uniform(0, 10)
+            if binary:
+                writer.write(encode_binary_reading(device, time.time(), ph, solids, turbidity))
+            else:
+                writer.write(json.dumps({'device': f'esp32-{device:02d}', 'ph': round(ph, 2),
+                                         'tds': round(solids), 'turbidity': round(turbidity, 2)}).encode() + b'\n')
+            sent += 1
+        await writer.drain()
+        await asyncio.sleep(0.01)
+    writer.close()
+    await writer.wait_closed()
+    return sent
+
+
+async def simulate(host, port, devices, rate, seconds, binary):
+    start = time.perf_counter()
+    counts = await asyncio.gather(*(simulate_device(host, port, d, rate / devices, seconds, binary)
+                                    for d in range(devices)))
+    elapsed = time.perf_counter() - start
+    print(f"Sent {sum(counts):,} readings from {devices} devices in {elapsed:.1f}s "
+          f"({sum(counts) / elapsed:,.0f}/s, {'binary' if binary else 'JSON'})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest and score ESP32 sensor readings.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    srv = sub.add_parser('serve', help="Run the ingestion server")
+    srv.add_argument('--host', default='0.0.0.0')
+    srv.add_argument('--port', type=int, default=DEFAULT_PORT)
+    srv.add_argument('--model', default=DEFAULT_MODEL)
+    srv.add_argument('--live-path', default=DEFAULT_LIVE_PATH)
+    srv.add_argument('--history-db', default=DEFAULT_DB, help="Shared history database ('' to disable)")
+    srv.add_argument('--max-batch', type=int, default=512)
+    srv.add_argument('--max-delay-ms', type=float, default=10.0)
+    sim = sub.add_parser('simulate', help="Push synthetic readings at a running server")
+    sim.add_argument('--host', default='127.0.0.1')
+    sim.add_argument('--port', type=int, default=DEFAULT_PORT)
+    sim.add_argument('--devices', type=int, default=20)
+    sim.add_argument('--rate', type=float, default=2000, help="Total readings per second")
+    sim.add_argument('--seconds', type=float, default=10)
+    sim.add_argument('--binary', action='store_true', help="Use the compact binary format")
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        predictor = HotPredictor(fallback=lambda: WaterPredictor.from_path(args.model, use_grid=False))
+        store = LiveStore(args.live_path)
+        store.model_version = predictor.version
+        history = HistoryStore(args.history_db) if args.history_db else None
+        try:
+            asyncio.run(serve(args.host, args.port, predictor, store, args.max_batch, args.max_delay_ms / 1e3, history))
+        except KeyboardInterrupt:
+            store.flush()
+            if history is not None:
+                history.flush()
+    else:
+        asyncio.run(simulate(args.host, args.port, args.devices, args.rate, args.seconds, args.binary))
+
+
+if __name__ == "__main__":
+    main()
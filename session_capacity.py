@@ -0,0 +1,119 @@
+"""Concurrent new-session capacity of a Streamlit dashboard.
+
+Starts `streamlit run` for each app, then opens N brand-new browser sessions
+against it over Streamlit's websocket protocol, K at a time, and times each
+session from connect until its first page has finished rendering (every
+st.rerun() hop on the way included).  That first-run time is how long the
+server keeps a script thread busy for one new visitor.
+
+    python session_capacity.py app7.py --sessions 200 --concurrency 200
+    python session_capacity.py app6.py app7.py
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(app_path, port, timeout=60):
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', app_path, '--server.headless', 'true',
+         '--server.port', str(port), '--server.address', '127.0.0.1',
+         '--browser.gatherUsageStats', 'false', '--server.fileWatcherType', 'none'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/_stcore/health', timeout=1)
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"streamlit run {app_path} did not come up on port {port}")
+
+
+async def open_session(port, timeout):
+    """Connect as a new visitor; seconds until the first page run finishes."""
+    import websockets
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+    t0 = time.perf_counter()
+    async with websockets.connect(f'ws://127.0.0.1:{port}/_stcore/stream', subprotocols=['streamlit'],
+                                  origin=f'http://127.0.0.1:{port}', max_size=None,
+                                  ping_interval=None) as ws:
+        rerun = BackMsg()
+        rerun.rerun_script.query_string = ''
+        rerun.rerun_script.page_script_hash = ''
+        await ws.send(rerun.SerializeToString())
+        while True:
+            msg = ForwardMsg()
+            msg.ParseFromString(await asyncio.wait_for(ws.recv(), timeout))
+            if msg.WhichOneof('type') != 'script_finished':
+                continue
+            if msg.script_finished == ForwardMsg.FINISHED_SUCCESSFULLY:
+                return time.perf_counter() - t0
+            if msg.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                raise RuntimeError(f"script run ended with status {msg.script_finished}")
+
+
+async def open_sessions(port, sessions, concurrency, timeout):
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with gate:
+            return await open_session(port, timeout)
+
+    start = time.perf_counter()
+    times = await asyncio.gather(*(one() for _ in range(sessions)))
+    return times, time.perf_counter() - start
+
+
+def measure(app_path, sessions, concurrency, timeout=120):
+    port = free_port()
+    proc = start_server(app_path, port)
+    try:
+        # One visitor first so cached resources (the model) are loaded before timing
+        asyncio.run(open_sessions(port, 1, 1, timeout))
+        times, elapsed = asyncio.run(open_sessions(port, sessions, concurrency, timeout))
+    finally:
+        proc.terminate()
+        proc.wait()
+    times = np.array(times) * 1e3
+    return {
+        'sessions_per_s': sessions / elapsed,
+        'p50_ms': float(np.percentile(times, 50)),
+        'p99_ms': float(np.percentile(times, 99)),
+        'thread_s_per_session': float(times.mean() / 1e3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure concurrent new-session capacity of Streamlit apps.")
+    parser.add_argument('apps', nargs='+', help="App scripts to serve, e.g. app7.py")
+    parser.add_argument('--sessions', type=int, default=200, help="New sessions to open per app")
+    parser.add_argument('--concurrency', type=int, default=200, help="Sessions connecting at the same time")
+    args = parser.parse_args(argv)
+
+    print(f"{args.sessions} new sessions, {args.concurrency} at a time")
+    print(f"{'app':<16} {'sessions/s':>11} {'p50 first page':>15} {'p99 first page':>15} {'thread-s/session':>17}")
+    for app in args.apps:
+        stats = measure(os.path.abspath(app), args.sessions, args.concurrency)
+        print(f"{os.path.basename(app):<16} {stats['sessions_per_s']:>11.1f} {stats['p50_ms']:>12.0f} ms "
+              f"{stats['p99_ms']:>12.0f} ms {stats['thread_s_per_session']:>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Import-time profile and cold-start budget for the dashboards.
+
+`profile` runs an app's first page once in a fresh interpreter under
+`python -X importtime` and lists which modules that page pulled in and what
+each cost.  Streamlit itself (and the test harness) are imported before the
+run starts, so only the app's own imports are counted.
+
+`check` starts `streamlit run` cold, opens one browser session and times
+launch to first paint: the moment the first page's script run finishes.  It
+exits non-zero when any app is over budget, so it can guard CI.
+
+    python startup_budget.py profile app7.py --top 15
+    python startup_budget.py check app4.py app6.py app7.py      # budget 1500 ms
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+from session_capacity import free_port, open_session, start_server
+
+DEFAULT_BUDGET_MS = 1500
+MARKER = '--- first page run ---'
+
+_FIRST_RUN = f"""
+import sys
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({{app!r}}, default_timeout=120)
+sys.stderr.write({MARKER!r} + '\\n'); sys.stderr.flush()
+at.run()
+if at.exception:
+    raise SystemExit(at.exception[0].message)
+"""
+
+
+def import_profile(app_path):
+    """[(module, self_us, cumulative_us, depth)] imported by the first run of app_path."""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', _FIRST_RUN.format(app=app_path)],
+                          cwd=os.path.dirname(app_path), capture_output=True, text=True)
+    if proc.returncode:
+        raise RuntimeError(f"{app_path}: first run failed\n{proc.stderr[-2000:]}")
+    lines = proc.stderr.split(MARKER, 1)[1].splitlines()
+    entries = []
+    for line in lines:
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if not self_us.strip().isdigit():
+            continue  # header row
+        entries.append((name.strip(), int(self_us), int(cumulative_us), (len(name) - len(name.lstrip()) - 1) // 2))
+    return entries
+
+
+def print_profile(app_path, top):
+    entries = import_profile(app_path)
+    total = sum(cum for _, _, cum, depth in entries if depth == 0)
+    print(f"{os.path.basename(app_path)}: first page imported {len(entries)} modules in {total / 1e3:.0f} ms")
+    # Top-level entries are the imports the app (or a module it imports lazily) asked for
+    print(f"  {'cumulative':>10}  module")
+    for name, _, cum, _ in sorted((e for e in entries if e[3] == 0), key=lambda e: -e[2])[:top]:
+        print(f"  {cum / 1e3:>7.1f} ms  {name}")
+
+
+def cold_start(app_path, timeout=120):
+    """(ms until the server answers, ms until the first page has painted) from launch."""
+    port = free_port()
+    t0 = time.perf_counter()
+    proc = start_server(app_path, port, timeout)
+    try:
+        server_ms = (time.perf_counter() - t0) * 1e3
+        asyncio.run(open_session(port, timeout))
+        return server_ms, (time.perf_counter() - t0) * 1e3
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile app imports and check the cold-start budget.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('profile', help="Per-module import cost of an app's first page")
+    p.add_argument('apps', nargs='+')
+    p.add_argument('--top', type=int, default=20)
+    c = sub.add_parser('check', help="Fail when launch-to-first-paint exceeds the budget")
+    c.add_argument('apps', nargs='+')
+    c.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS)
+    args = parser.parse_args(argv)
+
+    if args.command == 'profile':
+        for app in args.apps:
+            print_profile(os.path.abspath(app), args.top)
+        return 0
+
+    failed = []
+    print(f"{'app':<16} {'server up':>10} {'first paint':>12}  budget {args.budget_ms:.0f} ms")
+    for app in args.apps:
+        server_ms, paint_ms = cold_start(os.path.abspath(app))
+        ok = paint_ms <= args.budget_ms
+        if not ok:
+            failed.append(app)
+        print(f"{os.path.basename(app):<16} {server_ms:>7.0f} ms {paint_ms:>9.0f} ms  {'ok' if ok else 'OVER BUDGET'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+import os
+import pickle
+import sys
+
+import numpy as np
+import pytest
+
+# The modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forest_engine import FlatForest  # noqa: E402
+from model_artifact import export_artifact  # noqa: E402
+
+
+def train_forest(seed=0, n_estimators=20):
+    from sklearn.ensemble import RandomForestClassifier
+
+    rng = np.random.default_rng(seed)
+    X = rng.random((400, 3)) * np.array([14.0, 50000.0, 20.0])
+    y = ((X[:, 0] > 6.5) & (X[:, 0] < 8.5) & (X[:, 2] < 10.0)).astype(int)
+    return RandomForestClassifier(n_estimators=n_estimators, random_state=seed).fit(X, y)
+
+
+def save_model(model, directory, name='water_model'):
+    """Pickle plus .aqsf export, as train_model.py writes them; returns the pickle path."""
+    path = os.path.join(directory, name + '.pkl')
+    with open(path, 'wb') as f:
+        pickle.dump(model, f)
+    export_artifact(FlatForest.from_sklearn(model), os.path.join(directory, name + '.aqsf'))
+    return path
+
+
+@pytest.fixture(scope='session')
+def forest():
+    return train_forest()
+
+
+@pytest.fixture
+def model_path(forest, tmp_path):
+    return save_model(forest, str(tmp_path))
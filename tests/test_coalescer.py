@@ -0,0 +1,67 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from coalescer import PredictionCoalescer
+
+
+class GatedRows:
+    """predict_rows stand-in that holds each call until the gate opens."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.started = threading.Event()
+
+    def __call__(self, X):
+        self.started.set()
+        assert self.gate.wait(5)
+        return X[:, 0].tolist()
+
+
+def test_cancelled_await_does_not_kill_the_batching_thread():
+    rows = GatedRows()
+    coalescer = PredictionCoalescer(rows, max_wait=0.0)
+
+    async def cancel_while_scoring():
+        task = asyncio.ensure_future(coalescer.predict_async([1.0, 2.0, 3.0]))
+        await asyncio.get_running_loop().run_in_executor(None, rows.started.wait, 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_while_scoring())
+    rows.gate.set()
+    assert coalescer.predict([4.0, 2.0, 3.0], timeout=5) == 4.0
+    coalescer.close()
+
+
+def test_cancelled_while_queued_is_dropped():
+    rows = GatedRows()
+    coalescer = PredictionCoalescer(rows, max_wait=0.0)
+    busy = coalescer.submit([1.0, 2.0, 3.0])
+    assert rows.started.wait(5)
+    queued = coalescer.submit([2.0, 2.0, 3.0])
+    assert queued.cancel()
+    rows.gate.set()
+    assert busy.result(5) == 1.0
+    assert coalescer.predict([3.0, 2.0, 3.0], timeout=5) == 3.0
+    assert coalescer.stats()['items'] == 2
+    coalescer.close()
+
+
+def test_failing_batch_fails_only_its_callers():
+    calls = []
+
+    def predict_rows(X):
+        calls.append(len(X))
+        if len(calls) == 1:
+            raise ValueError("bad batch")
+        return np.asarray(X[:, 0])
+
+    coalescer = PredictionCoalescer(predict_rows, max_wait=0.0)
+    with pytest.raises(ValueError):
+        coalescer.predict([1.0, 2.0, 3.0], timeout=5)
+    assert coalescer.predict([5.0, 2.0, 3.0], timeout=5) == 5.0
+    coalescer.close()
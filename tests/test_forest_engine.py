@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from forest_engine import FlatForest, sample_inputs
+
+
+@pytest.fixture(scope='module')
+def engine(forest):
+    return FlatForest.from_sklearn(forest)
+
+
+def assert_parity(model, engine, X):
+    # Exact: the engine promises sklearn's probabilities bit for bit
+    np.testing.assert_array_equal(engine.predict_proba(X), model.predict_proba(X))
+
+
+def threshold_rows(engine, seed=0):
+    """Rows whose split feature sits exactly on, and one float step around, every threshold."""
+    # Missing-value-only splits have an infinite threshold; there is nothing around it to test
+    split = ~engine.is_leaf & np.isfinite(engine.threshold)
+    features, thresholds = engine.feature[split], np.asarray(engine.threshold)[split]
+    t32 = thresholds.astype(np.float32)
+    values = np.concatenate([
+        thresholds,
+        np.nextafter(thresholds, np.inf), np.nextafter(thresholds, -np.inf),
+        t32.astype(np.float64),  # float32 rounding can land on either side of the float64 threshold
+        np.nextafter(t32, np.float32(np.inf)).astype(np.float64),
+        np.nextafter(t32, np.float32(-np.inf)).astype(np.float64),
+    ])
+    X = sample_inputs(len(values), seed=seed)
+    X[np.arange(len(values)), np.tile(features, 6)] = values
+    return X
+
+
+def test_random_rows(forest, engine):
+    assert_parity(forest, engine, sample_inputs(20_000, seed=1))
+
+
+def test_single_row(forest, engine):
+    X = sample_inputs(1, seed=2)
+    assert_parity(forest, engine, X)
+    np.testing.assert_array_equal(engine.predict_proba(X[0]), forest.predict_proba(X))
+
+
+def test_values_at_and_around_thresholds(forest, engine):
+    assert_parity(forest, engine, threshold_rows(engine))
+
+
+def test_nan_features(forest, engine):
+    X = sample_inputs(3_000, seed=3)
+    X[:1000, 0] = np.nan
+    X[1000:2000, 1] = np.nan
+    X[2000:, [0, 2]] = np.nan
+    assert_parity(forest, engine, X)
+
+
+def test_nan_directions_learned_in_training():
+    from sklearn.ensemble import RandomForestClassifier
+
+    rng = np.random.default_rng(4)
+    X = sample_inputs(600, seed=4)
+    y = ((X[:, 0] > 6.5) & (X[:, 0] < 8.5)).astype(int)
+    X[rng.random(X.shape) < 0.15] = np.nan
+    model = RandomForestClassifier(n_estimators=15, random_state=0).fit(X, y)
+    engine = FlatForest.from_sklearn(model)
+    assert engine.missing_left.any() and not engine.missing_left.all()
+
+    test = sample_inputs(5_000, seed=5)
+    test[rng.random(test.shape) < 0.3] = np.nan
+    assert_parity(model, engine, test)
+    assert_parity(model, engine, threshold_rows(engine, seed=6))
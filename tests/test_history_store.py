@@ -0,0 +1,14 @@
+from history_store import HistoryStore
+
+
+def test_bad_row_does_not_drop_its_batch(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    store.append_many([(1.0, 'esp32-01', 7.0, 300.0, 1.0, 1, 0.9, 'v1'),
+                       (2.0, None, 7.1, 310.0, 1.1, 1, 0.8, 'v1'),  # device is NOT NULL
+                       (3.0, 'esp32-02', 6.9, 320.0, 1.2, 0, 0.7, 'v1')])
+    store.flush()
+    stats = store.stats()
+    assert (stats['written'], stats['dropped'], stats['errors']) == (2, 1, 1)
+    rows, _ = store.page(10)
+    assert [row['device'] for row in rows] == ['esp32-02', 'esp32-01']
+    assert store.count() == 2
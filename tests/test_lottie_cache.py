@@ -0,0 +1,71 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from lottie_cache import LottieCache, load_bundled
+
+DOC = {'v': '5.7.4', 'fr': 30, 'ip': 0, 'op': 60, 'w': 10, 'h': 10, 'layers': []}
+
+
+class LottieHandler(BaseHTTPRequestHandler):
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append(self.headers.get('If-None-Match'))
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = json.dumps(DOC).encode('utf-8')
+        self.send_response(200)
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def lottie_url():
+    LottieHandler.requests_seen = []
+    server = HTTPServer(('127.0.0.1', 0), LottieHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/water.json"
+    server.shutdown()
+    server.server_close()
+
+
+def wait_idle(cache, timeout=10):
+    deadline = time.monotonic() + timeout
+    while cache._refreshing:
+        assert time.monotonic() < deadline, "refresh did not finish"
+        time.sleep(0.01)
+
+
+def test_offline_serves_the_bundled_copy_and_backs_off(tmp_path):
+    cache = LottieCache(str(tmp_path))
+    url = "http://127.0.0.1:9/water.json"  # discard port: nothing answers
+    assert cache.get(url, bundled='water_drop.json') == load_bundled('water_drop.json')
+    wait_idle(cache)
+    assert cache.get(url) is None
+    assert cache.refresh_async(url) is None  # inside the back-off window
+
+
+def test_downloads_once_then_revalidates(tmp_path, lottie_url):
+    cache = LottieCache(str(tmp_path))
+    cache.get(lottie_url, bundled='water_drop.json')
+    wait_idle(cache)
+    assert cache.get(lottie_url) == DOC
+
+    # A new process finds it on disk; past the TTL it revalidates with the ETag
+    stale = LottieCache(str(tmp_path), ttl=0)
+    assert stale.get(lottie_url) == DOC
+    wait_idle(stale)
+    assert LottieHandler.requests_seen == [None, '"v1"']
+    assert stale.get(lottie_url) == DOC
@@ -0,0 +1,53 @@
+import gc
+import threading
+import time
+import weakref
+
+from coalescer import PredictionCoalescer
+from conftest import save_model, train_forest
+from model_registry import HotPredictor, ModelRegistry
+from prediction_cache import PredictionCache
+
+
+def configure(predictor):
+    # What the dashboards and servers attach to every version
+    predictor.cache = PredictionCache(maxsize=64)
+    predictor.coalescer = PredictionCoalescer(predictor.predict_rows)
+
+
+def wait_for(condition, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+def test_swaps_do_not_leak_threads_or_models(tmp_path):
+    registry = ModelRegistry(str(tmp_path / 'models'))
+    registry.publish(save_model(train_forest(seed=0), str(tmp_path), name='v0'))
+    hot = HotPredictor(registry, configure=configure, poll_interval=0.02)
+    hot.predict_one(7.0, 20000.0, 4.0)
+    first = weakref.ref(hot.active())
+    threads = threading.active_count()
+
+    for seed in range(1, 5):
+        registry.publish(save_model(train_forest(seed=seed), str(tmp_path), name=f'v{seed}'))
+        wait_for(lambda: hot.swaps == seed)
+        result = hot.predict_one(7.0, 20000.0, 4.0)
+        assert result.version == hot.active().version == registry.current()
+
+    assert threading.active_count() == threads
+    gc.collect()
+    assert first() is None
+
+
+def test_closed_coalescer_still_answers(forest):
+    from predictor import WaterPredictor
+
+    predictor = WaterPredictor(forest)
+    coalescer = PredictionCoalescer(predictor.predict_rows)
+    coalescer.close()
+    assert not coalescer._thread.is_alive()
+    result = coalescer.predict([7.0, 20000.0, 4.0])
+    expected = predictor.predict_rows([[7.0, 20000.0, 4.0]])[0]
+    assert (result.label, result.confidence) == (expected.label, expected.confidence)
@@ -0,0 +1,57 @@
+import asyncio
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from forest_engine import sample_inputs
+from model_registry import ModelRegistry
+from model_server import RemoteModel, load_server_predictor, serve
+from predictor import FLAT_MAX_ROWS
+
+
+def test_missing_model_is_an_error_not_a_stand_in(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_server_predictor(str(tmp_path / 'water_model.pkl'), registry=ModelRegistry(str(tmp_path / 'models')))
+
+
+def test_serves_the_model_file(model_path, tmp_path):
+    predictor = load_server_predictor(model_path, registry=ModelRegistry(str(tmp_path / 'models')))
+    assert predictor.active().bulk_path == model_path
+
+
+@pytest.mark.filterwarnings('ignore:overflow encountered in cast')
+def test_rejected_request_gets_an_error_and_keeps_the_connection(model_path, tmp_path):
+    predictor = load_server_predictor(model_path, registry=ModelRegistry(str(tmp_path / 'models')))
+    socket_path = str(tmp_path / 'model.sock')
+    running = {}
+
+    async def run_server():
+        running['loop'], running['stop'] = asyncio.get_running_loop(), asyncio.Event()
+        server = asyncio.create_task(serve(socket_path, predictor))
+        await running['stop'].wait()
+        server.cancel()
+
+    thread = threading.Thread(target=asyncio.run, args=(run_server(),), daemon=True)
+    thread.start()
+    try:
+        deadline = time.monotonic() + 10
+        while not os.path.exists(socket_path):
+            assert time.monotonic() < deadline, "server did not start"
+            time.sleep(0.01)
+        model = RemoteModel(socket_path)
+        X = sample_inputs(FLAT_MAX_ROWS + 44)
+        bad = X.copy()
+        bad[7, 0] = 1e39  # past float32: the large-batch path rejects it
+        with pytest.raises(ValueError, match='infinity'):
+            model.predict_proba(bad)
+        conn = model._connection()
+        # Same connection, and the answer a local predictor gives (p_potable travels as float32)
+        np.testing.assert_allclose(model.predict_proba(X), predictor.predict_proba(X), atol=1e-6)
+        assert model._connection() is conn
+    finally:
+        running['loop'].call_soon_threadsafe(running['stop'].set)
+        thread.join(10)
+        predictor.close()
@@ -0,0 +1,37 @@
+import numpy as np
+
+from forest_engine import FlatForest, sample_inputs
+from predictor import FLAT_MAX_ROWS, WaterPredictor
+
+
+def test_artifact_is_preferred_for_single_rows(model_path):
+    predictor = WaterPredictor.from_path(model_path, use_grid=False)
+    assert isinstance(predictor.model, FlatForest)
+    assert predictor.bulk_path == model_path
+
+
+def test_large_batches_skip_flat_forest(model_path, forest, monkeypatch):
+    predictor = WaterPredictor.from_path(model_path, use_grid=False)
+    walked = []
+    flat_predict = predictor.engine.predict_proba
+    monkeypatch.setattr(predictor.engine, 'predict_proba', lambda X: walked.append(len(X)) or flat_predict(X))
+
+    X = sample_inputs(FLAT_MAX_ROWS * 4)
+    _, _, proba = predictor.predict_batch(X)
+    assert walked == []
+    np.testing.assert_array_equal(proba, forest.predict_proba(X))
+
+    predictor.predict_batch(X[:FLAT_MAX_ROWS])
+    assert walked == [FLAT_MAX_ROWS]
+
+
+def test_stale_pickle_is_not_used_for_large_batches(model_path, tmp_path):
+    from conftest import save_model, train_forest
+
+    # A pickle of a different forest next to the artifact must not answer for it
+    other = save_model(train_forest(seed=1), str(tmp_path), name='other')
+    predictor = WaterPredictor.from_path(model_path, use_grid=False)
+    predictor.bulk_path = other
+    assert predictor.bulk_model() is None
+    X = sample_inputs(FLAT_MAX_ROWS * 2)
+    np.testing.assert_array_equal(predictor.predict_proba(X), predictor.engine.predict_proba(X))
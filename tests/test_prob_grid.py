@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from predictor import WaterPredictor
+from prob_grid import ProbabilityGrid, axis_values
+
+# Coarse lattice so nearest-point answers differ from the forest between points
+AXES = (('ph', 0.0, 14.0, 0.5), ('Solids', 0.0, 50000.0, 5000.0), ('Turbidity', 0.0, 20.0, 1.0))
+
+
+def coarse_grid(predictor, **meta):
+    axes = [axis_values(low, high, step) for _, low, high, step in AXES]
+    points = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, 3)
+    n_trees = predictor.engine.n_trees
+    votes = np.round(predictor.predict_proba(points)[:, predictor.potable_index] * n_trees).astype(np.uint8)
+    meta = {'axes': [{'name': name, 'low': low, 'step': step, 'size': len(values)}
+                     for (name, low, _, step), values in zip(AXES, axes)],
+            'classes': predictor.classes.tolist(), 'potable_index': predictor.potable_index,
+            'encoding': 'votes', 'n_trees': n_trees, **meta}
+    return ProbabilityGrid(votes.reshape([len(a) for a in axes]), meta)
+
+
+def test_off_lattice_reading_uses_live_inference(forest):
+    predictor = WaterPredictor(forest)
+    predictor.grid = coarse_grid(predictor)
+    # A reading just past the pH 6.5 boundary snaps to the lattice point on the other side
+    reading = (6.6, 20000.0, 4.0)
+    nearest = predictor.grid.proba_row(int(predictor.grid.table[13, 4, 4]))[predictor.potable_index]  # pH 6.5
+    live = forest.predict_proba(np.array([reading]))[0, predictor.potable_index]
+    assert (nearest > 0.5) != (live > 0.5), "reading should sit across a decision boundary from its lattice point"
+    assert predictor.grid.lookup(*reading) is None
+    result = predictor.predict_one(*reading)
+    assert result.label == forest.predict(np.array([reading]))[0]
+    assert result.proba[predictor.potable_index] == live
+
+
+def test_lattice_reading_uses_grid(forest, monkeypatch):
+    predictor = WaterPredictor(forest)
+    predictor.grid = coarse_grid(predictor)
+    live = predictor.predict_proba([[7.0, 20000.0, 4.0]])[0]
+    monkeypatch.setattr(predictor, 'predict_rows', lambda X: (_ for _ in ()).throw(AssertionError("live call")))
+    np.testing.assert_array_equal(predictor.predict_one(7.0, 20000.0, 4.0).proba, live)
+    # Float noise from widget arithmetic still counts as on the lattice
+    np.testing.assert_array_equal(predictor.grid.lookup(0.1 * 70, 20000.0, 4.0), live)
+
+
+def test_grid_answers_are_the_live_answers(forest):
+    # /predict answers from the grid, /predict_batch from the forest: same reading, same numbers
+    predictor = WaterPredictor(forest)
+    predictor.grid = coarse_grid(predictor)
+    axes = [axis_values(low, high, step) for _, low, high, step in AXES]
+    points = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, 3)
+    labels, confidence, proba = predictor.predict_batch(points)
+    for row, label, conf, expected in zip(points.tolist(), labels.tolist(), confidence.tolist(), proba):
+        result = predictor.predict_one(*row)
+        assert (result.label, result.confidence) == (label, conf)
+        np.testing.assert_array_equal(result.proba, expected)
+
+
+def test_legacy_float16_grid_is_refused(forest):
+    predictor = WaterPredictor(forest)
+    grid = coarse_grid(predictor)
+    with pytest.raises(ValueError):
+        ProbabilityGrid(grid.table.astype(np.float16), dict(grid.meta, encoding=None))
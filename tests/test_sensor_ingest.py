@@ -0,0 +1,127 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from predictor import WaterPredictor
+from sensor_ingest import (LiveStore, MicroBatcher, encode_binary_reading, handle_device, parse_binary_readings,
+                           parse_json_reading)
+
+
+class SlowPredictor:
+    """Stands in for HotPredictor; every batch takes `delay` seconds to score."""
+
+    version = 'slow'
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.scored = []
+
+    def active(self):
+        return self
+
+    def predict_batch(self, X):
+        time.sleep(self.delay)
+        self.scored.append(X[:, 0].tolist())
+        return np.ones(len(X), np.int64), np.full(len(X), 0.9), None
+
+
+def test_scoring_does_not_block_the_event_loop(tmp_path):
+    predictor = SlowPredictor(delay=0.2)
+    batcher = MicroBatcher(predictor, LiveStore(str(tmp_path / 'live.json')), max_batch=2, max_delay=0.001)
+
+    async def scenario():
+        runner = asyncio.create_task(batcher.run())
+        batcher.add([('d1', 0.0, 1.0, 2.0, 3.0), ('d2', 0.0, 2.0, 2.0, 3.0),
+                     ('d3', 0.0, 3.0, 2.0, 3.0), ('d4', 0.0, 4.0, 2.0, 3.0)])
+        ticks = 0
+        while len(predictor.scored) < 2:
+            await asyncio.sleep(0.01)
+            ticks += 1
+        runner.cancel()
+        return ticks
+
+    try:
+        ticks = asyncio.run(scenario())
+    finally:
+        batcher.close()
+    # 0.4 s of scoring; the loop kept ticking every 10 ms instead of stalling behind it
+    assert ticks >= 20
+    assert predictor.scored == [[1.0, 2.0], [3.0, 4.0]]
+
+
+@pytest.mark.parametrize('line', [
+    b'{"device": "d1", "ph": null, "tds": 300, "turbidity": 1.0}',
+    b'[1, 2, 3]',
+    b'{"device": "d1", "ph": 1e39, "tds": 300, "turbidity": 1.0}',
+    b'{"device": "d1", "ph": NaN, "tds": 300, "turbidity": 1.0}',
+    b'{"device": "d1", "ph": 7.0, "tds": Infinity, "turbidity": 1.0}',
+    b'{"device": "d1", "ph": 7.0, "tds": 1' + b'0' * 400 + b', "turbidity": 1.0}',
+    b'{"device": "d1", "ph": "high", "tds": 300, "turbidity": 1.0}',
+    b'{"device": "d1", "ts": [1], "ph": 7.0, "tds": 300, "turbidity": 1.0}',
+])
+def test_malformed_json_reading_is_a_value_error(line):
+    with pytest.raises(ValueError):
+        parse_json_reading(line)
+
+
+def test_json_reading():
+    assert parse_json_reading(b'{"device": "d1", "ts": 5, "pH": 7.1, "tds": 350, "ntu": 1.5}') == \
+        ('d1', 5.0, 7.1, 350.0, 1.5)
+
+
+def test_binary_records_with_non_finite_values_are_skipped():
+    buffer = (encode_binary_reading(1, 5.0, 7.0, 300.0, 1.0) + encode_binary_reading(2, 5.0, float('nan'), 300.0, 1.0)
+              + encode_binary_reading(3, 5.0, 7.0, float('inf'), 1.0) + encode_binary_reading(4, 5.0, 6.5, 200.0, 2.0))
+    readings, used = parse_binary_readings(buffer + b'\xa5')
+    assert [r[0] for r in readings] == ['1', '4']
+    assert used == len(buffer)
+
+
+class ClosingWriter:
+    def close(self):
+        pass
+
+
+def test_malformed_lines_keep_the_connection(tmp_path):
+    batcher = MicroBatcher(None, None)
+
+    async def feed():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b'{"device": "d1", "ph": 7.0, "tds": 300, "turbidity": 1.0}\n'
+                         b'{"device": "d1", "ph": null, "tds": 300, "turbidity": 1.0}\n'
+                         b'[1, 2, 3]\n'
+                         b'{"device": "d1", "ph": 7.2, "tds": 310, "turbidity": 1.1}\n')
+        reader.feed_eof()
+        await handle_device(reader, ClosingWriter(), batcher)
+
+    asyncio.run(feed())
+    batcher.close()
+    assert [r[2] for r in batcher.pending] == [7.0, 7.2]
+
+
+@pytest.mark.filterwarnings('ignore:overflow encountered in cast')
+def test_unscorable_batch_is_dropped_and_ingest_goes_on(model_path, tmp_path):
+    store = LiveStore(str(tmp_path / 'live.json'))
+    batcher = MicroBatcher(WaterPredictor.from_path(model_path, use_grid=False), store, max_batch=300,
+                           max_delay=0.001)
+    bad = [('d1', 0.0, 7.0, 300.0, 1.0)] * 299 + [('d2', 0.0, 1e39, 300.0, 1.0)]  # past float32, on the sklearn path
+    good = [('d3', 0.0, 7.0, 300.0, 1.0)] * 300
+
+    async def scenario():
+        runner = asyncio.create_task(batcher.run())
+        batcher.add(bad)
+        while batcher.failed == 0:
+            await asyncio.sleep(0.01)
+        batcher.add(good)
+        while store.readings == 0:
+            assert not runner.done()
+            await asyncio.sleep(0.01)
+        runner.cancel()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        batcher.close()
+    assert (batcher.failed, store.readings) == (300, 300)
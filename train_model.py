@@ -0,0 +1,254 @@
+"""Rebuild water_model.pkl from the water-potability dataset.
+
+Loads the CSV (ph / Solids / Turbidity / Potability), fills missing values
+with column means, and runs a cross-validated grid search over Random Forest
+settings on a process pool.  Fold assignments and the mean-imputed features
+of every fold are cached on disk, keyed by the data and the split settings,
+and workers memory-map them instead of receiving copies.  Means come from
+each fold's training rows only, so the held-out rows never leak into
+imputation.  Every fit is seeded, so reruns give the same scores and the
+same refit forests whatever the number of workers; only timings vary.
+
+Each candidate is also refit on all rows and timed on the serving path, and
+the table shows CV accuracy next to single-row latency and size.  The most
+accurate candidate within the latency budget is written as a pickle plus the
+memory-mapped .aqsf artifact next to it.
+
+    python train_model.py water_potability.csv --budget-ms 0.5
+    python train_model.py water_potability.csv --out /tmp/candidate.pkl --publish
+"""
+import argparse
+import hashlib
+import inspect
+import itertools
+import json
+import os
+import pickle
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from forest_engine import FlatForest, best_time, sample_inputs
+from model_artifact import artifact_path_for, export_artifact
+from predictor import BASE_DIR, DEFAULT_MODEL, FEATURES, WaterPredictor
+
+TARGET = 'Potability'
+TRAIN_CACHE = os.path.join(BASE_DIR, '.model_cache', 'train')
+DEFAULT_DATA = os.path.join(BASE_DIR, 'water_potability.csv')
+DEFAULT_BUDGET_MS = 1.0
+SEARCH_SPACE = {
+    'n_estimators': (25, 50, 100, 200),
+    'max_depth': (None, 8, 12),
+    'min_samples_leaf': (1, 4),
+}
+
+
+# --- 1. DATA AND FOLDS ---
+def load_dataset(path, features=FEATURES):
+    df = pd.read_csv(path, usecols=[*features, TARGET])
+    return df[features].to_numpy(np.float64), df[TARGET].to_numpy(np.int64)
+
+
+def impute_means(X, rows):
+    """X with every NaN replaced by its column's mean over `rows`."""
+    means = np.nanmean(X[rows], axis=0)
+    return np.where(np.isnan(X), means, X)
+
+
+def stratified_folds(y, n_folds, seed):
+    """Fold number of every row; each fold keeps the overall class balance."""
+    rng = np.random.default_rng(seed)
+    fold = np.empty(len(y), np.int8)
+    for cls in np.unique(y):
+        rows = rng.permutation(np.flatnonzero(y == cls))
+        fold[rows] = np.arange(len(rows)) % n_folds
+    return fold
+
+
+def prepare_folds(X, y, n_folds, seed, cache_dir=TRAIN_CACHE):
+    """Directory holding fold.npy, y.npy and features.npy, built on first use.
+
+    features[k] is X imputed with fold k's training means; features[n_folds]
+    uses the means of all rows, for the final fit.
+    """
+    recipe = json.dumps([n_folds, seed, inspect.getsource(impute_means), inspect.getsource(stratified_folds)])
+    digest = hashlib.sha256(X.tobytes() + y.tobytes() + recipe.encode('utf-8')).hexdigest()[:16]
+    path = os.path.join(cache_dir, digest)
+    if os.path.exists(path):
+        return path, True
+    fold = stratified_folds(y, n_folds, seed)
+    features = np.stack([impute_means(X, fold != k) for k in range(n_folds)] + [impute_means(X, slice(None))])
+    tmp = f"{path}.{os.getpid()}.tmp"
+    os.makedirs(tmp)
+    for name, array in (('fold', fold), ('y', y), ('features', features)):
+        np.save(os.path.join(tmp, name + '.npy'), array)
+    try:
+        os.replace(tmp, path)
+    except OSError:
+        shutil.rmtree(tmp)  # another run cached the same folds first
+    return path, False
+
+
+# --- 2. SEARCH ---
+# Workers map the cached folds once and then only receive (params, fold) pairs
+_folds = None
+
+
+def _init_worker(folds_dir):
+    global _folds
+    _folds = {name: np.load(os.path.join(folds_dir, name + '.npy'), mmap_mode='r')
+              for name in ('fold', 'y', 'features')}
+
+
+def _fit(params, k, seed):
+    from sklearn.ensemble import RandomForestClassifier
+
+    fold, y, X = _folds['fold'], _folds['y'], _folds['features'][k]
+    train = fold != k if k < len(_folds['features']) - 1 else slice(None)
+    model = RandomForestClassifier(random_state=seed, n_jobs=1, **params)
+    model.fit(X[train], y[train])
+    return model
+
+
+def _score_fold(params, k, seed):
+    fold = _folds['fold']
+    model = _fit(params, k, seed)
+    test = fold == k
+    return float((model.predict(_folds['features'][k][test]) == _folds['y'][test]).mean())
+
+
+def _fit_full(params, seed):
+    return _fit(params, len(_folds['features']) - 1, seed)
+
+
+def candidates(space=SEARCH_SPACE):
+    return [dict(zip(space, values)) for values in itertools.product(*space.values())]
+
+
+def search(folds_dir, n_folds, seed, workers, space=SEARCH_SPACE, report=print):
+    """[(params, fold accuracies, model refit on all rows)] for every candidate."""
+    grid = candidates(space)
+    scores = [[None] * n_folds for _ in grid]
+    models = [None] * len(grid)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(folds_dir,)) as pool:
+        jobs = {}
+        for i, params in enumerate(grid):
+            for k in range(n_folds):
+                jobs[pool.submit(_score_fold, params, k, seed)] = (i, k)
+            jobs[pool.submit(_fit_full, params, seed)] = (i, None)
+        start = time.perf_counter()
+        for done, future in enumerate(as_completed(jobs), start=1):
+            i, k = jobs[future]
+            if k is None:
+                models[i] = future.result()
+            else:
+                scores[i][k] = future.result()
+            if report and (done % 25 == 0 or done == len(jobs)):
+                report(f"  {done:>4}/{len(jobs)} fits  {time.perf_counter() - start:6.1f}s")
+    return list(zip(grid, scores, models))
+
+
+# --- 3. SERVING COST ---
+def serving_cost(model, calls=1000, passes=3):
+    """Single-row latency percentiles (ms) on the dashboards' path, 1k-row batch time, bytes.
+
+    Each percentile is the best of a few passes, so a stray scheduler hiccup
+    does not push a candidate over the budget.
+    """
+    predictor = WaterPredictor(model)
+    rows = sample_inputs(calls, seed=3)
+    for row in rows[:50]:
+        predictor.predict_batch(row[None])  # warm-up
+    p50, p99 = [], []
+    times = np.empty(calls)
+    for _ in range(passes):
+        for n, row in enumerate(rows):
+            t0 = time.perf_counter()
+            predictor.predict_batch(row[None])
+            times[n] = time.perf_counter() - t0
+        p50.append(np.percentile(times, 50))
+        p99.append(np.percentile(times, 99))
+    batch_s = best_time(predictor.predict_batch, sample_inputs(1000, seed=4), 10)
+    return {'p50_ms': float(min(p50) * 1e3), 'p99_ms': float(min(p99) * 1e3),
+            'batch_ms': batch_s * 1e3, 'nodes': predictor.engine.n_nodes, 'bytes': predictor.engine.nbytes}
+
+
+def choose(rows, budget_ms):
+    """Most accurate candidate whose single-row p99 fits the budget (else the fastest)."""
+    within = [r for r in rows if r['p99_ms'] <= budget_ms]
+    if within:
+        return max(within, key=lambda r: (r['accuracy'], -r['p99_ms']))
+    return min(rows, key=lambda r: r['p99_ms'])
+
+
+def _depth(params):
+    return 'none' if params['max_depth'] is None else params['max_depth']
+
+
+def print_table(rows, chosen, budget_ms):
+    print(f"{'trees':>5} {'depth':>5} {'leaf':>4}  {'cv accuracy':>13}  {'p50 ms':>7} {'p99 ms':>7} "
+          f"{'1k rows':>8} {'nodes':>9} {'size':>8}")
+    for r in sorted(rows, key=lambda r: -r['accuracy']):
+        p = r['params']
+        mark = '*' if r is chosen else ('!' if r['p99_ms'] > budget_ms else ' ')
+        print(f"{p['n_estimators']:>5} {_depth(p):>5} {p['min_samples_leaf']:>4}  "
+              f"{r['accuracy']:.4f}±{r['std']:.4f}  {r['p50_ms']:7.3f} {r['p99_ms']:7.3f} "
+              f"{r['batch_ms']:6.2f}ms {r['nodes']:>9,} {r['bytes'] / 1e6:6.1f}MB {mark}")
+    print(f"* chosen   ! over the {budget_ms:g} ms single-row p99 budget")
+
+
+# --- 4. DRIVER ---
+def save_model(model, out, source):
+    with open(out, 'wb') as f:
+        pickle.dump(model, f)
+    # Written after the pickle, so resolve_model_path() prefers it
+    return export_artifact(FlatForest.from_sklearn(model), artifact_path_for(out), source=source)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train and select the water-potability model.")
+    parser.add_argument('data', nargs='?', default=DEFAULT_DATA, help="CSV with ph, Solids, Turbidity, Potability")
+    parser.add_argument('--out', default=DEFAULT_MODEL, help="Pickle to write; the .aqsf goes next to it")
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help=f"Worker processes (this host has {os.cpu_count()} CPUs)")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help="Single-row p99 latency budget the chosen model must meet")
+    parser.add_argument('--publish', action='store_true', help="Also publish the model to the registry")
+    args = parser.parse_args(argv)
+
+    X, y = load_dataset(args.data)
+    print(f"{args.data}: {len(y):,} samples, {int(np.isnan(X).any(axis=1).sum()):,} with missing values, "
+          f"{y.mean():.1%} potable")
+    folds_dir, cached = prepare_folds(X, y, args.folds, args.seed)
+    print(f"{args.folds} stratified folds {'from cache' if cached else 'cached'} in {folds_dir}")
+
+    n = len(candidates())
+    print(f"Searching {n} candidates x {args.folds} folds on {args.workers} worker(s)")
+    results = search(folds_dir, args.folds, args.seed, args.workers)
+    rows = []
+    for params, scores, model in results:
+        # Timed one at a time after the pool has exited, so fits do not skew latencies
+        rows.append({'params': params, 'accuracy': float(np.mean(scores)), 'std': float(np.std(scores)),
+                     'model': model, **serving_cost(model)})
+    chosen = choose(rows, args.budget_ms)
+    print_table(rows, chosen, args.budget_ms)
+    if chosen['p99_ms'] > args.budget_ms:
+        print("No candidate meets the budget; writing the fastest one")
+
+    source = {'data': os.path.basename(args.data), 'params': chosen['params'], 'seed': args.seed,
+              'cv_accuracy': round(chosen['accuracy'], 4), 'folds': args.folds}
+    header = save_model(chosen['model'], args.out, source)
+    print(f"Wrote {args.out} and {artifact_path_for(args.out)} (version {header['content_hash'][:12]}); "
+          f"rebuild its grid with: python prob_grid.py build --model {args.out}")
+    if args.publish:
+        from model_registry import ModelRegistry
+        print(f"Published {ModelRegistry().publish(args.out)} (current)")
+
+
+if __name__ == "__main__":
+    main()
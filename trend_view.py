@@ -0,0 +1,201 @@
+"""Per-device sensor trend charts over days or weeks.
+
+Raw readings stay in the history store; the browser only ever gets a few
+thousand points per chart.  The time range is cut into fixed buckets aligned
+to the epoch and each bucket keeps the minimum and maximum of every feature
+together with their timestamps, which preserves spikes and dips a mean would
+hide.  Min/max buckets merge, so new readings only touch the newest bucket:
+each refresh fetches the rows after a keyset cursor and folds them in with a
+few vectorized NumPy calls, and buckets that leave the window are dropped.
+
+    python trend_view.py --bench 5000000      # initial catch-up, refresh, points per chart
+"""
+import argparse
+import os
+import threading
+import time
+
+import numpy as np
+import streamlit as st
+
+FEATURES = (('ph', 'pH'), ('solids', 'Solids (ppm)'), ('turbidity', 'Turbidity (NTU)'))
+SPANS = {"24 hours": 24 * 3600, "7 days": 7 * 24 * 3600, "30 days": 30 * 24 * 3600}
+MAX_POINTS = 2000
+FETCH_CHUNK = 200_000
+
+
+class TrendSeries:
+    """Min/max buckets of one device's readings over the last `span` seconds.
+
+    The cursor follows reading timestamps, so a reading stored later with a
+    timestamp before the cursor is not picked up.
+    """
+
+    def __init__(self, device, span, max_points=MAX_POINTS):
+        self.device = device
+        self.span = span
+        # Two points per bucket; the window can straddle one extra partial bucket
+        self.width = span / (max_points // 2 - 1)
+        self.cursor = None
+        self.readings = 0
+        self.keys = np.empty(0, np.int64)
+        self.count = np.empty(0, np.int64)
+        # feature -> (4, buckets): min, max, time of min, time of max
+        self.agg = {name: np.empty((4, 0)) for name, _ in FEATURES}
+        self._lock = threading.Lock()
+
+    def update(self, store, now=None):
+        """Fold in readings stored since the last update; returns how many."""
+        with self._lock:
+            now = time.time() if now is None else now
+            if self.cursor is None:
+                self.cursor = (now - self.span, 0)
+            added = 0
+            while True:
+                ids, values = store.series(self.device, self.cursor, FETCH_CHUNK)
+                if len(ids):
+                    self._fold(values)
+                    self.cursor = (values[-1, 0], int(ids[-1]))
+                    added += len(ids)
+                if len(ids) < FETCH_CHUNK:
+                    break
+            self._trim(now)
+            self.readings += added
+            return added
+
+    def _fold(self, values):
+        ts = values[:, 0]
+        keys = np.floor(ts / self.width).astype(np.int64)
+        # Rows arrive in time order, so each bucket is one contiguous run
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        ends = np.r_[starts[1:], len(keys)] - 1
+        new_keys = keys[starts]
+        new_count = ends - starts + 1
+        new_agg = {}
+        for col, (name, _) in enumerate(FEATURES, start=1):
+            v = values[:, col]
+            order = np.lexsort((v, keys))  # by bucket, then value: run ends are min and max
+            lo, hi = order[starts], order[ends]
+            new_agg[name] = np.stack([v[lo], v[hi], ts[lo], ts[hi]])
+
+        if len(self.keys) and self.keys[-1] == new_keys[0]:
+            # The newest stored bucket is still filling: merge it with the first new one
+            for name, _ in FEATURES:
+                old, new = self.agg[name][:, -1], new_agg[name][:, 0]
+                if new[0] < old[0]:
+                    old[[0, 2]] = new[[0, 2]]
+                if new[1] >= old[1]:
+                    old[[1, 3]] = new[[1, 3]]
+                new_agg[name] = new_agg[name][:, 1:]
+            self.count[-1] += new_count[0]
+            new_keys, new_count = new_keys[1:], new_count[1:]
+        self.keys = np.concatenate([self.keys, new_keys])
+        self.count = np.concatenate([self.count, new_count])
+        for name, _ in FEATURES:
+            self.agg[name] = np.concatenate([self.agg[name], new_agg[name]], axis=1)
+
+    def _trim(self, now):
+        first = np.searchsorted(self.keys, int(np.floor((now - self.span) / self.width)))
+        if first:
+            self.keys, self.count = self.keys[first:], self.count[first:]
+            for name, _ in FEATURES:
+                self.agg[name] = self.agg[name][:, first:]
+
+    def points(self, name):
+        """(times, values) to plot for one feature, in time order."""
+        lo, hi, t_lo, t_hi = self.agg[name]
+        first_lo = t_lo <= t_hi
+        times = np.column_stack([np.where(first_lo, t_lo, t_hi), np.where(first_lo, t_hi, t_lo)]).ravel()
+        vals = np.column_stack([np.where(first_lo, lo, hi), np.where(first_lo, hi, lo)]).ravel()
+        keep = np.r_[True, times[1:] != times[:-1]]  # single-reading buckets plot once
+        return times[keep], vals[keep]
+
+    def frame(self, name):
+        import pandas as pd
+        times, vals = self.points(name)
+        return pd.DataFrame({'Time': pd.to_datetime(times, unit='s'), name: vals})
+
+
+_series = {}
+_series_lock = threading.Lock()
+
+
+def get_series(device, span):
+    # Shared across sessions: everyone watching a device reuses one set of buckets
+    with _series_lock:
+        key = (device, span)
+        if key not in _series:
+            _series[key] = TrendSeries(device, span)
+        return _series[key]
+
+
+def render_trends(store, device, span):
+    series = get_series(device, span)
+    series.update(store)
+    if not len(series.keys):
+        st.info(f"No readings from {device} in this range.")
+        return
+    tabs = st.tabs([label for _, label in FEATURES])
+    plotted = 0
+    for tab, (name, label) in zip(tabs, FEATURES):
+        frame = series.frame(name)
+        plotted = max(plotted, len(frame))
+        with tab:
+            st.line_chart(frame, x='Time', y=name, y_label=label, height=260)
+    st.caption(f"{int(series.count.sum()):,} readings · {plotted:,} points per chart "
+               f"({series.width / 60:.1f} min buckets, min and max of each)")
+
+
+# --- BENCHMARK ---
+def main(argv=None):
+    from history_store import BASE_DIR, HistoryStore
+
+    parser = argparse.ArgumentParser(description="Benchmark trend downsampling against a scratch history store.")
+    parser.add_argument('--bench', type=int, metavar='ROWS', help="Readings for one device spread over --days")
+    parser.add_argument('--days', type=float, default=7)
+    parser.add_argument('--db', default=os.path.join(BASE_DIR, 'trend_bench.db'))
+    args = parser.parse_args(argv)
+    if not args.bench:
+        parser.print_help()
+        return
+
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(args.db + suffix):
+            os.remove(args.db + suffix)
+    store = HistoryStore(args.db, batch_size=50_000)
+    rng = np.random.default_rng(0)
+    span = args.days * 24 * 3600
+    now = time.time()
+    ts = np.sort(rng.uniform(now - span, now, args.bench))
+    n = len(ts)
+    ph = 7 + np.sin(ts / 3600) + rng.normal(0, 0.2, n)
+    ph[rng.integers(0, n, 20)] = 2.0  # spikes that averaging would smooth away
+    store.append_many(zip(ts.tolist(), ['esp32-01'] * n, ph.tolist(), rng.uniform(0, 50000, n).tolist(),
+                          rng.uniform(0, 10, n).tolist(), [1] * n, [0.9] * n, ['bench'] * n))
+    store.flush()
+    print(f"{n:,} readings over {args.days:g} days, devices: {store.devices()}")
+
+    series = TrendSeries('esp32-01', span)
+    t0 = time.perf_counter()
+    series.update(store, now=now - 1)
+    print(f"initial catch-up:     {(time.perf_counter() - t0) * 1e3:9.1f} ms ({series.readings:,} readings)")
+    t0 = time.perf_counter()
+    series.update(store, now=now - 1)
+    print(f"refresh, no new rows: {(time.perf_counter() - t0) * 1e3:9.2f} ms")
+    fresh = now + np.arange(1, 501) * 0.01
+    store.append_many((t, 'esp32-01', 7.0, 100.0, 1.0, 1, 0.9, 'bench') for t in fresh.tolist())
+    store.flush()
+    t0 = time.perf_counter()
+    series.update(store, now=now + 5)
+    print(f"refresh, 500 new:     {(time.perf_counter() - t0) * 1e3:9.2f} ms")
+    t0 = time.perf_counter()
+    frames = [series.frame(name) for name, _ in FEATURES]
+    print(f"chart frames:         {(time.perf_counter() - t0) * 1e3:9.2f} ms")
+    print(f"points per chart:     {max(len(f) for f in frames):9,} (raw {series.readings:,}); "
+          f"pH min kept: {frames[0]['ph'].min():.1f}")
+    for suffix in ('', '-wal', '-shm'):
+        os.remove(args.db + suffix)
+
+
+if __name__ == "__main__":
+    main()